@@ -0,0 +1,264 @@
+"""
+Headless HTTP API for podcast generation, sharing the Streamlit app's
+pipeline, GCS cache and in-process memoization.
+
+    uvicorn api:api --host 0.0.0.0 --port 8000
+
+    POST /jobs                  submit {"movie", "allow_spoilers", "length", "imdb_id"}
+    GET  /jobs/{job_id}         poll status
+    GET  /jobs/{job_id}/script  dialogue script and chapter index
+    PUT  /jobs/{job_id}/script  replace the script; only changed lines are re-synthesized
+    GET  /jobs/{job_id}/sources source video metadata
+    GET  /jobs/{job_id}/audio   MP3 stream (supports Range requests)
+"""
+import asyncio
+import threading
+import time
+import uuid
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field
+
+from fastapi import FastAPI, HTTPException, Request
+from fastapi.responses import Response, StreamingResponse
+from pydantic import BaseModel
+
+import app
+from src import identity, memo
+from src.config import (setup_logging, PODCAST_LENGTH_OPTIONS, DEFAULT_LENGTH_PREFERENCE,
+                        API_MAX_CONCURRENT_JOBS, API_MAX_QUEUED_JOBS, API_JOB_HISTORY)
+from src.memo import EpisodeHandle
+from src.utils import find_similar_movie_imdb
+
+logger = setup_logging()
+
+AUDIO_CHUNK_BYTES = 64 * 1024
+
+# Each job runs the blocking pipeline (which starts its own event loops)
+# on this pool, so the pool size is the generation concurrency limit.
+_pipeline_pool = ThreadPoolExecutor(max_workers=API_MAX_CONCURRENT_JOBS, thread_name_prefix='api-job')
+
+
+class ScriptEdit(BaseModel):
+    script: str
+
+
+class JobRequest(BaseModel):
+    movie: str
+    allow_spoilers: bool = False
+    length: str = DEFAULT_LENGTH_PREFERENCE
+    imdb_id: str | None = None  # skips the IMDb lookup when given
+
+
+@dataclass
+class Job:
+    id: str
+    request: JobRequest
+    dedupe_key: tuple
+    status: str = 'queued'  # queued -> running -> done | failed
+    movie: str | None = None
+    handle: EpisodeHandle | None = None
+    error: str | None = None
+    submitted_at: float = field(default_factory=time.time)
+    started_at: float | None = None
+    finished_at: float | None = None
+
+    def describe(self) -> dict:
+        info = {
+            'job_id': self.id,
+            'status': self.status,
+            'movie': self.movie or self.request.movie,
+            'allow_spoilers': self.request.allow_spoilers,
+            'length': self.request.length,
+            'submitted_at': self.submitted_at,
+            'started_at': self.started_at,
+            'finished_at': self.finished_at,
+            'error': self.error,
+        }
+        if self.handle is not None:
+            info['length'] = self.handle.length_preference  # may be shorter after admission control
+        if self.status == 'done':
+            info['links'] = {name: f"/jobs/{self.id}/{name}" for name in ('script', 'sources', 'audio')}
+            info['audio_bytes'] = self.handle.podcast_size
+        return info
+
+
+class JobStore:
+    """
+    Bounded job table. Finished jobs are evicted oldest first; identical
+    requests that are still queued or running share one job.
+    """
+
+    def __init__(self, history: int):
+        self.history = history
+        self._jobs: OrderedDict[str, Job] = OrderedDict()
+        self._active: dict[tuple, str] = {}
+        self._lock = threading.Lock()
+
+    def get(self, job_id: str) -> Job:
+        with self._lock:
+            job = self._jobs.get(job_id)
+        if job is None:
+            raise HTTPException(404, f"Unknown job '{job_id}'")
+        return job
+
+    def pending(self) -> int:
+        with self._lock:
+            return sum(job.status in ('queued', 'running') for job in self._jobs.values())
+
+    def submit(self, request: JobRequest) -> tuple[Job, bool]:
+        """
+        Returns (job, created). created is False when an identical job is in flight.
+        """
+        dedupe_key = (request.imdb_id or identity.slugify(request.movie), request.allow_spoilers, request.length)
+        with self._lock:
+            job_id = self._active.get(dedupe_key)
+            if job_id is not None:
+                return self._jobs[job_id], False
+            job = Job(id=uuid.uuid4().hex, request=request, dedupe_key=dedupe_key)
+            self._jobs[job.id] = job
+            self._active[dedupe_key] = job.id
+            self._evict()
+        return job, True
+
+    def finish(self, job: Job):
+        with self._lock:
+            self._active.pop(job.dedupe_key, None)
+            self._evict()
+
+    def _evict(self):
+        finished = [job_id for job_id, job in self._jobs.items() if job.status in ('done', 'failed')]
+        for job_id in finished[:max(len(self._jobs) - self.history, 0)]:
+            del self._jobs[job_id]
+
+
+jobs = JobStore(API_JOB_HISTORY)
+
+
+def _run_pipeline(job: Job):
+    job.status = 'running'
+    job.started_at = time.time()
+    request = job.request
+    movie, imdb_id = request.movie, request.imdb_id
+    if imdb_id is None:
+        # same normalization as the Streamlit form
+        found, details = find_similar_movie_imdb(movie)
+        if found:
+            movie, imdb_id = f"{details['title']} ({details['release_date']})", details.get('imdb_id')
+    job.movie = movie
+    return app.generate_podcast(movie, allow_spoilers=request.allow_spoilers,
+                                length_preference=request.length, imdb_id=imdb_id)
+
+
+async def _run_job(job: Job):
+    try:
+        handle = await asyncio.get_running_loop().run_in_executor(_pipeline_pool, _run_pipeline, job)
+        job.handle = handle
+        job.status = 'done' if handle.ok else 'failed'
+        job.error = handle.error
+    except Exception as e:
+        logger.exception(f"Job {job.id} failed")
+        job.status = 'failed'
+        job.error = str(e)
+    finally:
+        job.finished_at = time.time()
+        jobs.finish(job)
+
+
+def _finished(job_id: str) -> Job:
+    job = jobs.get(job_id)
+    if job.status != 'done':
+        raise HTTPException(409, f"Job '{job_id}' is {job.status}")
+    return job
+
+
+api = FastAPI(title="CineCast AI")
+_background_tasks = set()
+
+
+@api.post("/jobs", status_code=202)
+async def submit_job(request: JobRequest):
+    if request.length not in PODCAST_LENGTH_OPTIONS:
+        raise HTTPException(422, f"length must be one of {sorted(PODCAST_LENGTH_OPTIONS)}")
+    if jobs.pending() >= API_MAX_CONCURRENT_JOBS + API_MAX_QUEUED_JOBS:
+        raise HTTPException(429, "Too many jobs in flight, retry later", headers={'Retry-After': '30'})
+
+    job, created = jobs.submit(request)
+    if created:
+        task = asyncio.create_task(_run_job(job))
+        _background_tasks.add(task)
+        task.add_done_callback(_background_tasks.discard)
+    return job.describe()
+
+
+@api.get("/jobs/{job_id}")
+async def job_status(job_id: str):
+    return jobs.get(job_id).describe()
+
+
+@api.get("/jobs/{job_id}/script")
+async def job_script(job_id: str):
+    handle = _finished(job_id).handle
+    script = await asyncio.to_thread(memo.resolve_review, handle)
+    chapters = await asyncio.to_thread(memo.resolve_chapters, handle)
+    return {'movie': handle.movie, 'script': script, 'chapters': chapters}
+
+
+@api.put("/jobs/{job_id}/script")
+async def revise_script(job_id: str, edit: ScriptEdit):
+    job = _finished(job_id)
+    job.handle = await asyncio.get_running_loop().run_in_executor(
+        _pipeline_pool, app.revise_episode, job.handle, edit.script)
+    return job.describe()
+
+
+@api.get("/jobs/{job_id}/sources")
+async def job_sources(job_id: str):
+    sources = await asyncio.to_thread(memo.resolve_transcripts, _finished(job_id).handle)
+    # transcripts themselves are large and only useful to the pipeline
+    return [{k: v for k, v in source.items() if k != 'transcript'} for source in sources]
+
+
+def _parse_range(header: str, size: int) -> tuple[int, int]:
+    """
+    Parse a single "bytes=start-end" range into an inclusive (start, end).
+    """
+    unit, _, spec = header.partition('=')
+    start_text, _, end_text = spec.partition('-')
+    if unit.strip() != 'bytes' or ',' in spec:
+        raise ValueError(header)
+    if start_text:
+        start = int(start_text)
+        end = min(int(end_text), size - 1) if end_text else size - 1
+    else:  # suffix range: last N bytes
+        start, end = max(size - int(end_text), 0), size - 1
+    if start > end or start >= size:
+        raise ValueError(header)
+    return start, end
+
+
+@api.get("/jobs/{job_id}/audio")
+async def job_audio(job_id: str, request: Request):
+    handle = _finished(job_id).handle
+    podcast = await asyncio.to_thread(memo.resolve_podcast, handle)
+    size = len(podcast)
+    headers = {'Accept-Ranges': 'bytes'}
+    status = 200
+    start, end = 0, size - 1
+
+    range_header = request.headers.get('range')
+    if range_header:
+        try:
+            start, end = _parse_range(range_header, size)
+        except ValueError:
+            return Response(status_code=416, headers={'Content-Range': f"bytes */{size}"})
+        status = 206
+        headers['Content-Range'] = f"bytes {start}-{end}/{size}"
+    headers['Content-Length'] = str(end - start + 1)
+
+    def _chunks():
+        view = memoryview(podcast)
+        for offset in range(start, end + 1, AUDIO_CHUNK_BYTES):
+            yield bytes(view[offset:min(offset + AUDIO_CHUNK_BYTES, end + 1)])
+
+    return StreamingResponse(_chunks(), status_code=status, media_type='audio/mpeg', headers=headers)
@@ -1,15 +1,23 @@
 import streamlit as st
-import pandas as pd
 import pickle
+import threading
 import time
-from google.cloud import storage
-from src.config import setup_logging, GCS_BUCKET_NAME
+from concurrent.futures import ThreadPoolExecutor
+from functools import partial
+from src.config import setup_logging, SUMMARY_MODE, REFRESH_POOL_SIZE
 from src.config import PODCAST_LENGTH_OPTIONS, LENGTH_PREFERENCE_ORDER, DEFAULT_LENGTH_PREFERENCE
-from src.search import get_video_transcripts
-from src.review import review_summary_parallel_with_retry, get_final_summary
+from src.search import find_review_transcripts, video_id
+from src.freshness import is_stale
+from src.ranking import select_top_sources
+from src.review import review_summary_parallel_with_retry, stream_final_summary, merge_points
 from src.utils import find_similar_movie_imdb
-from src.audio import create_podcast
-from youtube_search import YoutubeSearch
+from src.storage import episode_paths, get_bucket, split_title_year
+from src import admission, catalog, identity, memo, metrics
+from src.memo import EpisodeHandle
+from src.audio import create_podcast, create_podcast_streaming, resynthesize_podcast
+from src.checkpoint import Checkpoint
+from src.llm_cache import llm_cache
+from src.uploads import publish_episode, load_manifest, download_committed, touch_manifest
 from dotenv import load_dotenv
 import os
 #from google.oauth2.service_account import Credentials
@@ -21,133 +29,338 @@ load_dotenv()
 
 logger = setup_logging()
 
-
-def main(movie: str, allow_spoilers: bool = False, length_preference: str = DEFAULT_LENGTH_PREFERENCE):
-    start_time = time.time()
-    if allow_spoilers:
-        search_term = movie + ' movie spoiler review'
+# Stale episodes are served as they are while a refresh runs here,
+# at most one per (movie key, spoilers, length) at a time.
+_refresh_pool = ThreadPoolExecutor(max_workers=REFRESH_POOL_SIZE, thread_name_prefix='refresh')
+_refreshing = set()
+_refreshing_lock = threading.Lock()
+
+
+def _refresh_in_background(movie: str, allow_spoilers: bool, length_preference: str, movie_key: str):
+    key = (movie_key, allow_spoilers, length_preference)
+    with _refreshing_lock:
+        if key in _refreshing:
+            return
+        _refreshing.add(key)
+
+    def _refresh():
+        try:
+            memo.memoized_episode(partial(main, refresh=True), movie, allow_spoilers=allow_spoilers,
+                                  length_preference=length_preference, movie_key=movie_key, regenerate=True)
+        except admission.Downgraded as downgraded:
+            # keep serving the stale episode rather than replacing it with a smaller one
+            admission.controller.release(downgraded.decision)
+            logger.info(f"Skipping background refresh of '{movie}': {downgraded.decision.reason}")
+        except Exception:
+            logger.exception(f"Background refresh of '{movie}' failed")
+        finally:
+            with _refreshing_lock:
+                _refreshing.discard(key)
+
+    _refresh_pool.submit(_refresh)
+
+
+def _load_cached(bucket, paths, manifest) -> tuple[list[dict], str, bytes]:
+    """
+    Download a committed episode: (video_transcripts, review, podcast_bytes).
+    """
+    if manifest is not None:
+        _, objects = download_committed(bucket, paths.manifest, ['podcast', 'review', 'transcripts'],
+                                        shared=(paths.legacy_transcripts,), manifest=manifest)
+        podcast_bytes, review_bytes, transcripts_bytes = (
+            objects['podcast'], objects['review'], objects['transcripts'])
     else:
-        search_term = movie + ' movie no spoiler review'
+        # episodes published before manifests existed shared one source list per spoiler setting
+        podcast_bytes = bucket.blob(paths.podcast).download_as_bytes()
+        review_bytes = bucket.blob(paths.review).download_as_bytes()
+        transcripts_bytes = bucket.blob(paths.legacy_transcripts).download_as_bytes()
+    return pickle.loads(transcripts_bytes), pickle.loads(review_bytes), podcast_bytes
+
+
+def main(movie: str, allow_spoilers: bool = False, length_preference: str = DEFAULT_LENGTH_PREFERENCE,
+         refresh: bool = False, movie_key: str | None = None,
+         admitted: admission.Decision | None = None):
+    """
+    Generate (or load from cache) the episode for one movie/spoiler/length.
+    The episode is cached under movie_key (resolved from the title if not given).
+    With refresh=True the episode is rebuilt incrementally from the stored
+    sources plus any new review videos. A cached episode past its freshness
+    TTL is returned as is while that refresh runs in the background.
+
+    Cache misses go through admission control first; a downgrade (fewer
+    sources or a shorter length) raises admission.Downgraded so the caller
+    can rerun main for the decided length with the reservation passed as
+    `admitted`. An episode built with fewer sources is marked in its
+    manifest and rebuilt in full once the budget allows.
+    """
+    start_time = time.time()
     max_results = 20
 
-    gcs_bucket_name = GCS_BUCKET_NAME
-    directory_name = movie.lower().replace(' ', '_')
-    spoiler_suffix = "_spoiler" if allow_spoilers else "_no_spoiler"
-
-    try:
-        length_options = PODCAST_LENGTH_OPTIONS.get(
-            length_preference, PODCAST_LENGTH_OPTIONS[DEFAULT_LENGTH_PREFERENCE])
-        length_suffix = length_options["filename_suffix"]
-    except KeyError:
-        logger.error(
-            f"Invalid length_preference '{length_preference}' and fallback failed. Using empty suffix.")
-        length_suffix = ""
-
-    podcast_gcs_path = f"{directory_name}/{directory_name}{spoiler_suffix}{length_suffix}_podcast.mp3"
-    review_gcs_path = f"{directory_name}/{directory_name}{spoiler_suffix}{length_suffix}_review_text.pkl"
-    transcripts_gcs_path = f"{directory_name}/{directory_name}{spoiler_suffix}_source_videos.pkl"
-
-    #storage_client = storage.Client(credentials=credentials)
-    storage_client = storage.Client()
-    bucket = storage_client.bucket(gcs_bucket_name)
-
-    podcast_blob = bucket.blob(podcast_gcs_path)
-    review_blob = bucket.blob(review_gcs_path)
-    transcripts_blob = bucket.blob(transcripts_gcs_path)
+    bucket = get_bucket()
+    movie_key = movie_key or identity.movie_key(movie, bucket=bucket)
+    paths = episode_paths(movie_key, allow_spoilers, length_preference)
 
     cache_log_suffix = f" (spoilers: {allow_spoilers}, length: {length_preference})"
 
-    if podcast_blob.exists() and review_blob.exists() and transcripts_blob.exists():
-        logger.info(f"Cache hit for '{movie}'{cache_log_suffix}")
-        podcast_bytes = podcast_blob.download_as_bytes()
-        review_pickle_bytes = review_blob.download_as_bytes()
-        transcripts_pickle_bytes = transcripts_blob.download_as_bytes()
-
-        review = pickle.loads(review_pickle_bytes)
-        video_transcripts = pickle.loads(transcripts_pickle_bytes)
+    length_options = PODCAST_LENGTH_OPTIONS.get(
+        length_preference, PODCAST_LENGTH_OPTIONS[DEFAULT_LENGTH_PREFERENCE])
 
+    manifest = load_manifest(bucket, paths.manifest)
+    sources_limit = None
+    if manifest is not None:
+        built_at = manifest.get('checked_at', manifest['created_at'])
+        sources_limit = manifest.get('sources_limit')
+    else:
+        # episodes published before manifests existed
+        legacy_blob = bucket.get_blob(paths.podcast)
+        complete = (legacy_blob is not None and bucket.blob(paths.review).exists()
+                    and bucket.blob(paths.legacy_transcripts).exists())
+        built_at = legacy_blob.updated.timestamp() if complete and legacy_blob.updated else None
+
+    if built_at is not None and not refresh and is_stale(movie, built_at):
+        logger.info(f"Cached episode for '{movie}'{cache_log_suffix} is stale, refreshing in the background")
+        _refresh_in_background(movie, allow_spoilers, length_preference, movie_key)
+
+    upgrade = False
+    if built_at is not None and not refresh and sources_limit and admitted is None:
+        # built with fewer sources under budget pressure: rebuild in full only
+        # if the budget allows it right now, otherwise keep serving it
+        decision = admission.controller.admit(length_preference, max_results, max_wait_s=0)
+        if decision.action == 'admit':
+            logger.info(f"Rebuilding '{movie}'{cache_log_suffix} with all sources "
+                        f"(cached episode used {sources_limit})")
+            admitted, upgrade = decision, True
+        elif decision.admitted:
+            admission.controller.release(decision)
+
+    if built_at is not None and not refresh and not upgrade:
+        logger.info(f"Cache hit for '{movie}'{cache_log_suffix}")
+        video_transcripts, review, podcast_bytes = _load_cached(bucket, paths, manifest)
         logger.info(
             f"Successfully loaded cached data for '{movie}'{cache_log_suffix} from GCS.")
-        return video_transcripts, review, podcast_bytes
+        if admitted is not None:
+            admission.controller.release(admitted)
+        return video_transcripts, review, podcast_bytes, None, bool(sources_limit)
 
     logger.info(
         f"Cache miss for '{movie}'{cache_log_suffix}. Generating new review.")
 
-    logger.info(
-        f'Searching YouTube for {"spoiler" if allow_spoilers else "non-spoiler"} reviews on {movie}...')
-    videos = YoutubeSearch(search_term, max_results=max_results).to_dict()
-    logger.info('Search complete, retrieving transcripts...')
-    video_transcripts = get_video_transcripts(
-        videos, movie, allow_spoilers=allow_spoilers)
-
-    if len(video_transcripts) < 2:
-        logger.info(
-            f"Not enough reviews found. Trying a more general search...")
-        general_search = movie + " movie review"
-        additional_videos = YoutubeSearch(
-            general_search, max_results=max_results).to_dict()
-        additional_transcripts = get_video_transcripts(
-            additional_videos, movie, allow_spoilers=allow_spoilers)
-        existing_ids = {v['url'] for v in video_transcripts}
-        for transcript in additional_transcripts:
-            if transcript['url'] not in existing_ids:
-                video_transcripts.append(transcript)
-
+    decision = admitted
+    if decision is None:
+        decision = admission.controller.admit(length_preference, max_results)
+        if not decision.admitted:
+            return [], decision.reason, None, None, False
+        if decision.action == 'downgrade':
+            raise admission.Downgraded(decision)
+    sources = min(length_options["max_sources"], decision.max_sources)
+    reduced = sources < length_options["max_sources"]
+
+    # Stage outputs are checkpointed as they complete so a retry after a
+    # crash or timeout resumes instead of starting over. A reduced-sources
+    # script gets its own checkpoint so the full rebuild doesn't resume it.
+    sources_checkpoint = Checkpoint(bucket, paths.directory, paths.sources_variant)
+    episode_checkpoint = Checkpoint(bucket, paths.directory,
+                                    f"{paths.variant}_{sources}_sources" if reduced else paths.variant)
+
+    # the sources checkpoint is shared by every length, but fetching stops at
+    # the length's quorum: a shorter build's sources are topped up for a longer one
+    quorum = length_options["source_quorum"]
+    candidate_transcripts = sources_checkpoint.load('transcripts')
+    fetched_quorum = sources_checkpoint.load('quorum') or 0
+    short = (candidate_transcripts is not None and len(candidate_transcripts) < quorum
+             and fetched_quorum < quorum)
+    if candidate_transcripts is None or refresh or short:
+        # on refresh only videos not seen in the previous build are fetched;
+        # their summaries are the only new LLM work before the final dialogue
+        known_sources = candidate_transcripts or []
+        if short and not refresh:
+            logger.info(f"Topping up {len(known_sources)} checkpointed sources to a quorum of {quorum}")
+        new_sources = find_review_transcripts(
+            movie, allow_spoilers=allow_spoilers, max_results=max_results,
+            quorum=quorum if refresh else quorum - len(known_sources),
+            known_ids={video_id(source) for source in known_sources})
+        if refresh:
+            logger.info(f"Refresh found {len(new_sources)} new sources for '{movie}'")
+        if refresh and not new_sources and manifest is not None:
+            # nothing new to say: keep the episode and restart its freshness TTL
+            touch_manifest(bucket, paths.manifest)
+            admission.controller.release(decision)
+            video_transcripts, review, podcast_bytes = _load_cached(bucket, paths, manifest)
+            return video_transcripts, review, podcast_bytes, None, bool(sources_limit)
+        candidate_transcripts = known_sources + new_sources
+        sources_checkpoint.save('transcripts', candidate_transcripts)
+        sources_checkpoint.save('quorum', max(quorum, fetched_quorum))
+
+    video_transcripts = select_top_sources(candidate_transcripts, sources, allow_spoilers=allow_spoilers)
+
+    token_stats = [s['transcript_tokens'] for s in video_transcripts if s.get('transcript_tokens')]
+    if token_stats:
+        raw = sum(t['raw_tokens'] for t in token_stats)
+        clean = sum(t['clean_tokens'] for t in token_stats)
+        logger.info(f"Summarization input: ~{clean} tokens after preprocessing (~{raw} raw, "
+                    f"{100 * (1 - clean / raw) if raw else 0:.0f}% saved)")
     logger.info('Retrieval complete, analyzing reviews...')
-    reviews = review_summary_parallel_with_retry(
-        video_transcripts, movie, allow_spoilers=allow_spoilers)
+    # channel history only counts sources summarized now: checkpointed ones were
+    # counted by the run that summarized them, and failures say nothing about the channel
+    channel_outcomes = []
+    per_review = review_summary_parallel_with_retry(
+        video_transcripts, movie, allow_spoilers=allow_spoilers, checkpoint=sources_checkpoint,
+        mode=SUMMARY_MODE, on_summary=lambda source, summary: channel_outcomes.append(
+            (source['creator'], bool(summary) and f'Not a "{movie}" review' not in summary)))
+    catalog.record_channel_results(channel_outcomes)
+    if SUMMARY_MODE == 'points':
+        reviews = merge_points(per_review, allow_spoilers=allow_spoilers)
+    else:
+        reviews = per_review
 
     if not reviews:
         logger.error("No valid reviews could be processed")
-        return video_transcripts, "No valid reviews could be processed for this movie.", None
-
-    try:
-        length_options = PODCAST_LENGTH_OPTIONS.get(
-            length_preference, PODCAST_LENGTH_OPTIONS[DEFAULT_LENGTH_PREFERENCE])
-        final_summary_length_instruction = length_options["prompt_instruction"]
-    except KeyError:
-        logger.error(
-            f"Invalid length_preference '{length_preference}' for final summary. Using default instruction.")
-        final_summary_length_instruction = PODCAST_LENGTH_OPTIONS[
-            DEFAULT_LENGTH_PREFERENCE]["prompt_instruction"]
-
-    logger.info(
-        f'Generating final summary with target length: "{final_summary_length_instruction}"')
-    review = get_final_summary(
-        reviews,
-        movie,
-        allow_spoilers=allow_spoilers,
-        length_prompt_instruction=final_summary_length_instruction
-    )
+        return video_transcripts, "No valid reviews could be processed for this movie.", None, None, False
 
-    logger.info('Analysis complete, generating podcast...')
+    final_summary_length_instruction = length_options["prompt_instruction"]
 
-    podcast_bytes = create_podcast(review)
+    review = None if refresh else episode_checkpoint.load('script')
+    if review:
+        logger.info('Script recovered from checkpoint, resuming podcast synthesis...')
+        podcast_bytes, chapters = create_podcast(review, checkpoint=episode_checkpoint)
+    else:
+        logger.info(
+            f'Generating final summary and podcast with target length: "{final_summary_length_instruction}"')
+        review, podcast_bytes, chapters = create_podcast_streaming(stream_final_summary(
+            reviews,
+            movie,
+            allow_spoilers=allow_spoilers,
+            length_prompt_instruction=final_summary_length_instruction
+        ), checkpoint=episode_checkpoint)
+
+    if not review:
+        logger.error("Final summary produced no dialogue lines")
+        return video_transcripts, f"Could not generate a final summary for {movie}.", None, None, False
     logger.info(f"Podcast generation complete")
 
-    review_pickle_bytes = pickle.dumps(review)
-    transcripts_pickle_bytes = pickle.dumps(video_transcripts)
-
-    podcast_blob.upload_from_string(podcast_bytes, content_type='audio/mpeg')
-    review_blob.upload_from_string(
-        review_pickle_bytes, content_type='application/octet-stream')
-    transcripts_blob.upload_from_string(
-        transcripts_pickle_bytes, content_type='application/octet-stream')
-    logger.info(
-        f"Successfully saved results for '{movie}'{cache_log_suffix} to GCS.")
+    # Uploads run in the background after the result is handed back; the
+    # catalog is only updated once the manifest has committed the episode.
+    title, year = split_title_year(movie)
+    publish_episode(
+        bucket, paths, podcast_bytes, review, video_transcripts, chapters=chapters,
+        sources_limit=sources if reduced else None,
+        on_committed=lambda m: catalog.record_episode(
+            paths.podcast, title, year, allow_spoilers, length_preference,
+            m['podcast_size'], created_at=m['created_at'], duration_sec=m['duration_s']),
+        on_failed=lambda e: memo.forget(movie_key, allow_spoilers, length_preference))
     logger.info(
         f"Time taken for '{movie}': {(time.time() - start_time):.2f} seconds")
-    return video_transcripts, review, podcast_bytes
-
-
-@st.cache_data(hash_funcs={bool: lambda x: f"spoiler_{x}"})
-def generate_podcast(movie_title, allow_spoilers=False, length_preference: str = DEFAULT_LENGTH_PREFERENCE):
-    video_transcripts, review, podcast_bytes = main(
-        movie_title,
-        allow_spoilers=allow_spoilers,
-        length_preference=length_preference
+    if llm_cache.mode != 'off':
+        logger.info(f"LLM cache stats: {llm_cache.stats()}")
+    logger.info(f"LLM and TTS usage by route:\n{metrics.format_report()}")
+    return video_transcripts, review, podcast_bytes, chapters, reduced
+
+
+def generate_podcast(movie_title, allow_spoilers=False, length_preference: str = DEFAULT_LENGTH_PREFERENCE,
+                     imdb_id: str | None = None) -> EpisodeHandle:
+    """
+    Memoized entry point for the UI. Returns a lightweight EpisodeHandle;
+    payloads are resolved from the bounded payload cache or GCS on demand.
+    If admission control downgrades the length, the handle is for the
+    shorter episode (check handle.length_preference).
+    """
+    key = identity.movie_key(movie_title, imdb_id)
+    try:
+        return memo.memoized_episode(main, movie_title, allow_spoilers=allow_spoilers,
+                                     length_preference=length_preference, movie_key=key)
+    except admission.Downgraded as downgraded:
+        decision = downgraded.decision
+        logger.info(f"'{movie_title}' downgraded to {decision.length_preference}: {decision.reason}")
+        ran = False
+
+        def _generate(*args, **kwargs):
+            nonlocal ran
+            ran = True
+            return main(*args, admitted=decision, **kwargs)
+
+        try:
+            return memo.memoized_episode(_generate, movie_title, allow_spoilers=allow_spoilers,
+                                         length_preference=decision.length_preference, movie_key=key)
+        finally:
+            # main owns the reservation once it runs; a memoized hit never calls it
+            if not ran:
+                admission.controller.release(decision)
+
+def revise_episode(handle: EpisodeHandle, script: str) -> EpisodeHandle:
+    """
+    Apply an edited dialogue script (e.g. a moderation fix) to a generated
+    episode. Only lines that changed are synthesized; the rest are spliced
+    from the existing audio at the bounds in its chapter index.
+    """
+    paths = episode_paths(handle.movie_key, handle.allow_spoilers, handle.length_preference)
+    bucket = get_bucket()
+    episode_checkpoint = Checkpoint(bucket, paths.directory, paths.variant)
+
+    old_chapters = memo.resolve_chapters(handle)
+    if old_chapters:
+        podcast_bytes, chapters, _ = resynthesize_podcast(
+            script, old_chapters, memo.resolve_podcast(handle), checkpoint=episode_checkpoint)
+    else:
+        # published before chapter indexes; line checkpoints still spare unchanged lines
+        logger.info(f"No chapter index for '{handle.movie}', rebuilding from line checkpoints")
+        podcast_bytes, chapters = create_podcast(script, checkpoint=episode_checkpoint)
+    episode_checkpoint.save('script', script)
+
+    title, year = split_title_year(handle.movie)
+    # a revised reduced-sources episode is still due a full rebuild
+    manifest = load_manifest(bucket, paths.manifest)
+    publish_episode(
+        bucket, paths, podcast_bytes, script, memo.resolve_transcripts(handle), chapters=chapters,
+        sources_limit=manifest.get('sources_limit') if manifest else None,
+        on_committed=lambda m: catalog.record_episode(
+            paths.podcast, title, year, handle.allow_spoilers, handle.length_preference,
+            m['podcast_size'], created_at=m['created_at'], duration_sec=m['duration_s']),
+        on_failed=lambda e: memo.forget(handle.movie_key, handle.allow_spoilers, handle.length_preference))
+    return memo.replace_episode(handle, script, podcast_bytes, chapters)
+
+def render_episode(handle: EpisodeHandle):
+    if not handle.ok:
+        st.error(handle.error)
+        return
+
+    podcast_bytes = memo.resolve_podcast(handle)
+
+    st.subheader(f"Podcast for '{handle.movie}' generated!")
+    st.audio(podcast_bytes, format="audio/mp3")
+
+    # Download button
+    spoiler_tag = "with_spoilers" if handle.allow_spoilers else "spoiler_free"
+    fname = f"{handle.movie.replace(' ', '_')}_{spoiler_tag}_{handle.length_preference}.mp3"
+    st.download_button(
+        label="Download Podcast",
+        data=podcast_bytes,
+        file_name=fname,
+        mime="audio/mp3",
     )
-    return video_transcripts, review, podcast_bytes
+
+    # Transcript expander, timestamped when the episode has a chapter index
+    with st.expander("Podcast Transcript"):
+        chapters = memo.resolve_chapters(handle)
+        if chapters:
+            for line in chapters['lines']:
+                stamp = (f"`{int(line['start_s'] // 60)}:{int(line['start_s'] % 60):02d}` "
+                         if line['start_s'] is not None else "")
+                st.markdown(f"{stamp}**{line['speaker']}:** {line['text']}")
+        else:
+            st.write(memo.resolve_review(handle))
+
+    # Source Videos expander
+    with st.expander("Source Videos"):
+        video_review_data = []
+        for info in memo.resolve_transcripts(handle):
+            tag = ("🚨 Contains Spoilers" 
+                if info.get("likely_has_spoilers", False) 
+                else "✅ Spoiler-Free")
+            link = f"[{info['title']} by {info['creator']}]({info['url']}) - {tag}"
+            video_review_data.append({"Reviews": link})
+        import pandas as pd
+        df = pd.DataFrame(video_review_data)
+        st.markdown(df.to_markdown(index=False), unsafe_allow_html=True)
 
 def render_header():
     st.markdown(
@@ -403,52 +616,34 @@ if __name__ == "__main__":
                     f"{'spoiler-free ' if not allow_spoilers else ''}"
                     f"podcast for '{movie_title}', may take up to 3 minutes..."
                 ):
-                    video_transcripts, review, podcast_bytes = generate_podcast(
+                    handle = generate_podcast(
                         movie_title,
                         allow_spoilers=allow_spoilers,
-                        length_preference=chosen_key
+                        length_preference=chosen_key,
+                        imdb_id=movie_details.get('imdb_id')
                     )
 
-                st.subheader(f"Podcast for '{movie_title}' generated!")
-                st.audio(podcast_bytes, format="audio/mp3")
-
-                if "recent_episodes" not in st.session_state:
-                    st.session_state.recent_episodes = []
-                # Save recent episode
-                new_episode = {
-                    "title": movie_title,
-                    "length": PODCAST_LENGTH_OPTIONS[chosen_key]["ui_label"],
-                    "has_spoilers": allow_spoilers,
-                    "timestamp": time.strftime("%B %d, %Y")
-                }
-                st.session_state.recent_episodes.insert(0, new_episode)
-                st.session_state.recent_episodes = st.session_state.recent_episodes[:3]
-
-                # Download button
-                spoiler_tag = "with_spoilers" if allow_spoilers else "spoiler_free"
-                fname = f"{movie_title.replace(' ', '_')}_{spoiler_tag}_{chosen_key}.mp3"
-                st.download_button(
-                    label="Download Podcast",
-                    data=podcast_bytes,
-                    file_name=fname,
-                    mime="audio/mp3",
-                )
-
-                # Transcript expander
-                with st.expander("Podcast Transcript"):
-                    st.write(review)
-
-                # Source Videos expander
-                with st.expander("Source Videos"):
-                    video_review_data = []
-                    for info in video_transcripts:
-                        tag = ("🚨 Contains Spoilers" 
-                            if info.get("likely_has_spoilers", False) 
-                            else "✅ Spoiler-Free")
-                        link = f"[{info['title']} by {info['creator']}]({info['url']}) - {tag}"
-                        video_review_data.append({"Reviews": link})
-                    df = pd.DataFrame(video_review_data)
-                    st.markdown(df.to_markdown(index=False), unsafe_allow_html=True)
+                st.session_state.episode_handle = handle
+                if handle.ok and handle.length_preference != chosen_key:
+                    st.info(f"We're busy right now, so this episode was made as a "
+                            f"{PODCAST_LENGTH_OPTIONS[handle.length_preference]['ui_label']} instead.")
+
+                if handle.ok:
+                    if "recent_episodes" not in st.session_state:
+                        st.session_state.recent_episodes = []
+                    # Save recent episode
+                    new_episode = {
+                        "title": movie_title,
+                        "length": PODCAST_LENGTH_OPTIONS[handle.length_preference]["ui_label"],
+                        "has_spoilers": allow_spoilers,
+                        "timestamp": time.strftime("%B %d, %Y")
+                    }
+                    st.session_state.recent_episodes.insert(0, new_episode)
+                    st.session_state.recent_episodes = st.session_state.recent_episodes[:3]
+
+        # ─── Current episode (survives reruns such as the download click) ───
+        if "episode_handle" in st.session_state:
+            render_episode(st.session_state.episode_handle)
 
         # ─── Recent Episodes Section ───
         if "recent_episodes" in st.session_state and st.session_state.recent_episodes:
@@ -1,7 +1,9 @@
 # pages/1_🎙️_Podcasts.py
+import time
 import streamlit as st
-import pandas as pd
-from pathlib import Path
+from src import catalog
+from src.config import PODCAST_LENGTH_OPTIONS, LENGTH_PREFERENCE_ORDER
+from src.storage import get_bucket
 
 st.set_page_config(page_title="Podcasts Library", page_icon="🎙️")
 
@@ -87,87 +89,71 @@ st.markdown(
 st.title("🎙️ Podcasts Library")
 st.markdown(
     """
-    Browse and filter your CineCast AI episodes.
-    This is a prototype—clicking “Play” won’t actually play audio yet!
+    Browse and filter every CineCast AI episode generated so far.
     """
 )
 
-# ─── Dummy Episode Data ───
-# In your real app this could come from GCS or a database.
-placeholder_url = Path("static/image.png").as_posix()
-
-episodes = [
-    {
-        "title": "Inception Deep Dive",
-        "genre": "Sci-Fi",
-        "year": 2010,
-        "length": "12 min",
-        "spoiler_free": False,
-        "poster": placeholder_url
-    },
-    {
-        "title": "The Godfather Breakdown",
-        "genre": "Crime",
-        "year": 1972,
-        "length": "7 min",
-        "spoiler_free": True,
-        "poster": placeholder_url
-    },
-    {
-        "title": "Pride & Prejudice Review",
-        "genre": "Romance",
-        "year": 2005,
-        "length": "3 min",
-        "spoiler_free": True,
-        "poster": placeholder_url
-    },
-    {
-        "title": "Jurassic Park Analysis",
-        "genre": "Adventure",
-        "year": 1993,
-        "length": "12 min",
-        "spoiler_free": False,
-        "poster": placeholder_url
-    },
-    {
-        "title": "The Matrix Discussion",
-        "genre": "Sci-Fi",
-        "year": 1999,
-        "length": "7 min",
-        "spoiler_free": True,
-        "poster": placeholder_url
-    },
-]
-
-df = pd.DataFrame(episodes)
+PAGE_SIZE = 12
+
+
+@st.cache_resource
+def _ensure_index():
+    # Rebuild the local index from the bucket once per server process, even
+    # when a previous process left rows behind (other instances may have
+    # published since); afterwards app.main keeps it current as episodes upload.
+    return catalog.rebuild_from_bucket(get_bucket())
+
+
+_ensure_index()
 
 # ─── Filter Bar ───
 with st.sidebar:
     st.header("Filters")
-    genres = sorted(df["genre"].unique())
-    years = sorted(df["year"].unique())
-    chosen_genres = st.multiselect("Genre", genres, default=genres)
-    chosen_years = st.slider("Decade", min(years), max(years), (min(years), max(years)), step=10)
-
-# apply filters
-filtered = df[
-    df["genre"].isin(chosen_genres) &
-    df["year"].between(chosen_years[0], chosen_years[1])
-]
-
-st.markdown(f"**{len(filtered)} episodes found**")
+    search = st.text_input("Title contains", "")
+    spoiler_choice = st.radio("Spoilers", ["Any", "Spoiler-Free", "Includes Spoilers"])
+    chosen_lengths = st.multiselect(
+        "Length",
+        LENGTH_PREFERENCE_ORDER,
+        default=LENGTH_PREFERENCE_ORDER,
+        format_func=lambda k: PODCAST_LENGTH_OPTIONS[k]["ui_label"],
+    )
+    bounds = catalog.year_bounds()
+    year_range = None
+    if bounds and bounds[0] < bounds[1]:
+        year_range = st.slider("Release Year", bounds[0], bounds[1], bounds)
+        if tuple(year_range) == bounds:
+            year_range = None  # untouched slider: keep episodes with no known year
+    if st.button("Rebuild index from storage"):
+        with st.spinner("Listing bucket..."):
+            catalog.rebuild_from_bucket(get_bucket())
+
+filters = {
+    "search": search.strip() or None,
+    "allow_spoilers": {"Any": None, "Spoiler-Free": False, "Includes Spoilers": True}[spoiler_choice],
+    "length_preferences": chosen_lengths,
+    "year_range": year_range,
+}
+
+total = catalog.count_episodes(**filters)
+st.markdown(f"**{total} episodes found**")
+
+n_pages = max(1, -(-total // PAGE_SIZE))
+page = st.number_input("Page", min_value=1, max_value=n_pages, value=1, step=1)
+episodes = catalog.query_episodes(limit=PAGE_SIZE, offset=(page - 1) * PAGE_SIZE, **filters)
 
 # ─── Episode Grid ───
 cols = st.columns(3, gap="medium")
-for idx, ep in filtered.iterrows():
+for idx, ep in enumerate(episodes):
     col = cols[idx % 3]
     with col:
-        st.image(ep["poster"], use_container_width=True)
-        st.markdown(f"### {ep['title']}")
-        st.markdown(f"**{ep['genre']}** • {ep['year']} • {ep['length']}")
+        year = f" ({ep['year']})" if ep["year"] else ""
+        st.markdown(f"### {ep['movie']}{year}")
+        minutes, seconds = divmod(int(ep["duration_sec"] or 0), 60)
+        length_label = PODCAST_LENGTH_OPTIONS.get(ep["length_preference"], {}).get("ui_label", ep["length_preference"])
+        st.markdown(f"**{length_label}** • {minutes}:{seconds:02d} • {ep['size_bytes'] / 1e6:.1f} MB")
         st.markdown(
-            "✅ Spoiler-Free" if ep["spoiler_free"] else "🚨 Includes Spoilers"
+            "🚨 Includes Spoilers" if ep["allow_spoilers"] else "✅ Spoiler-Free"
         )
-        st.button("▶️ Play", key=f"play_{idx}")
-
-# ─── End of Prototype ───
\ No newline at end of file
+        st.caption(f"Generated on {time.strftime('%B %d, %Y', time.localtime(ep['created_at']))}")
+        if st.button("▶️ Play", key=f"play_{ep['podcast_path']}"):
+            st.audio(get_bucket().blob(ep["podcast_path"]).download_as_bytes(), format="audio/mp3")
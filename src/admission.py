@@ -0,0 +1,265 @@
+"""
+Pre-run cost/latency estimates for cache-miss generations, and an admission
+controller that keeps the rolling LLM and TTS spend under configured budgets
+by queueing, downgrading or rejecting requests before any work starts.
+"""
+import logging
+import math
+import threading
+import time
+from collections import deque
+from dataclasses import dataclass
+
+from src import metrics
+from src.config import (PODCAST_LENGTH_OPTIONS, LENGTH_PREFERENCE_ORDER, SUMMARY_MODE,
+                        ADMISSION_BUDGETS, ADMISSION_WINDOW_SECONDS, ADMISSION_MAX_WAIT_SECONDS,
+                        ADMISSION_MIN_SOURCES)
+
+logger = logging.getLogger(__name__)
+
+# Per-call fallbacks used until a route has history in src.metrics:
+# (prompt tokens, output tokens, latency seconds)
+_DEFAULTS = {
+    'relevance': (150, 2, 0.6),
+    'review_summary': (3000, 1300, 12.0),
+    'review_points': (3000, 450, 6.0),
+    'final_dialogue': (6000, 3000, 45.0),
+    'tts': (0, 0, 1.5),
+}
+# share of summary calls retried until the route has error history
+DEFAULT_RETRY_RATE = 0.15
+# the targeted and fallback searches run together and both classify their results
+SEARCHES = 2
+TOKENS_PER_WORD = 1.35
+CHARS_PER_WORD = 6
+WORDS_PER_LINE = 30
+TTS_CONCURRENCY = 16  # rough number of TTS requests in flight at once
+
+
+@dataclass(frozen=True)
+class Estimate:
+    llm_calls: int
+    input_tokens: int
+    output_tokens: int
+    tts_chars: int
+    seconds: float
+
+    def __add__(self, other: 'Estimate') -> 'Estimate':
+        return Estimate(self.llm_calls + other.llm_calls, self.input_tokens + other.input_tokens,
+                        self.output_tokens + other.output_tokens, self.tts_chars + other.tts_chars,
+                        self.seconds + other.seconds)
+
+
+ZERO = Estimate(0, 0, 0, 0, 0.0)
+
+
+class Downgraded(Exception):
+    """
+    Raised by app.main when admission downgraded the request, so the caller
+    can rerun it for the decided length and keep a reduced-sources episode
+    out of the memo cache.
+    """
+
+    def __init__(self, decision):
+        super().__init__(decision.reason)
+        self.decision = decision
+
+
+def _route_profile(route: str) -> tuple[float, float, float]:
+    """
+    Average (prompt tokens, output tokens, latency) per call, from recorded
+    history when the route has any, else the built-in defaults.
+    """
+    prompt, output, latency = _DEFAULTS[route]
+    snap = metrics.report().get(route)
+    if snap and snap['calls']:
+        latency = snap['avg_latency_s']
+        if route != 'tts':
+            prompt = snap['prompt_tokens'] / snap['calls']
+            output = snap['output_tokens'] / snap['calls']
+    return prompt, output, latency
+
+
+def _retry_factor(route: str) -> float:
+    """
+    Attempts per successful call, from the route's recorded errors.
+    """
+    snap = metrics.report().get(route)
+    if snap and snap['calls']:
+        return 1 + snap['errors'] / snap['calls']
+    return 1 + DEFAULT_RETRY_RATE
+
+
+def estimate(length_preference: str, search_results: int, max_sources: int | None = None) -> Estimate:
+    """
+    Predict the LLM calls, tokens, TTS characters and wall time of one
+    cache-miss generation: relevance checks over the results of both
+    searches, per-review summaries (with retries), the final dialogue, then
+    TTS of the script.
+    """
+    options = PODCAST_LENGTH_OPTIONS[length_preference]
+    sources = max_sources or options['max_sources']
+    checks = SEARCHES * search_results
+    summary_route = 'review_points' if SUMMARY_MODE == 'points' else 'review_summary'
+
+    rel_in, rel_out, rel_latency = _route_profile('relevance')
+    sum_in, sum_out, sum_latency = _route_profile(summary_route)
+    dlg_in, _, dlg_latency = _route_profile('final_dialogue')
+    _, _, tts_latency = _route_profile('tts')
+
+    words = options['target_words']
+    dialogue_out = words * TOKENS_PER_WORD
+    # the dialogue prompt carries every per-review summary
+    dialogue_in = max(dlg_in, sources * sum_out)
+    lines = max(words // WORDS_PER_LINE, 1)
+    summaries = sources * _retry_factor(summary_route)
+
+    return Estimate(
+        llm_calls=checks + math.ceil(summaries) + 1,
+        input_tokens=int(checks * rel_in + summaries * sum_in + dialogue_in),
+        output_tokens=int(checks * rel_out + summaries * sum_out + dialogue_out),
+        tts_chars=words * CHARS_PER_WORD,
+        # stages run in sequence, calls within a stage in parallel; TTS
+        # overlaps the streamed dialogue so only its tail is added
+        seconds=round(rel_latency + sum_latency + dlg_latency
+                      + tts_latency * max(lines / TTS_CONCURRENCY, 1), 1),
+    )
+
+
+@dataclass(frozen=True)
+class Decision:
+    action: str                # 'admit', 'downgrade' or 'reject'
+    length_preference: str
+    max_sources: int
+    estimate: Estimate
+    waited_s: float = 0.0
+    reason: str = ""
+
+    @property
+    def admitted(self) -> bool:
+        return self.action != 'reject'
+
+
+class AdmissionController:
+    """
+    Rolling-window ledger of admitted estimates checked against
+    ADMISSION_BUDGETS (per window; 0 means unlimited).
+
+    A request that doesn't fit waits up to ADMISSION_MAX_WAIT_SECONDS for
+    earlier reservations to age out, then falls back to fewer sources and
+    shorter lengths, and is rejected only if even the smallest option
+    exceeds the budget.
+    """
+
+    def __init__(self, budgets: dict, window_s: float, max_wait_s: float):
+        self.budgets = {k: v for k, v in budgets.items() if v}
+        self.window_s = window_s
+        self.max_wait_s = max_wait_s
+        self._ledger: deque[tuple[float, Estimate]] = deque()
+        self._lock = threading.Lock()
+
+    def _expire(self, now: float):
+        while self._ledger and self._ledger[0][0] <= now - self.window_s:
+            self._ledger.popleft()
+
+    def _fits(self, usage: Estimate, est: Estimate) -> bool:
+        total = usage + est
+        return all(getattr(total, field) <= limit for field, limit in self.budgets.items())
+
+    def _usage(self, since: float = float('-inf')) -> Estimate:
+        usage = ZERO
+        for at, est in self._ledger:
+            if at > since:
+                usage = usage + est
+        return usage
+
+    def _wait_for(self, est: Estimate, now: float) -> float | None:
+        """
+        Seconds until est fits as reservations age out, or None if it never fits.
+        """
+        if not self._fits(ZERO, est):
+            return None
+        for at, _ in self._ledger:
+            if self._fits(self._usage(since=at), est):
+                return max(at + self.window_s - now, 0.0)
+        return 0.0
+
+    def _options(self, length_preference: str, max_sources: int):
+        """
+        Requested option first, then fewer sources, then shorter lengths.
+        """
+        yield length_preference, max_sources
+        for sources in range(max_sources - 1, ADMISSION_MIN_SOURCES - 1, -1):
+            yield length_preference, sources
+        shorter = LENGTH_PREFERENCE_ORDER[:LENGTH_PREFERENCE_ORDER.index(length_preference)]
+        for length in reversed(shorter):
+            yield length, min(PODCAST_LENGTH_OPTIONS[length]['max_sources'], max_sources)
+
+    def admit(self, length_preference: str, search_results: int, max_wait_s: float | None = None) -> Decision:
+        """
+        Reserve budget for one generation, blocking for a bounded wait
+        (max_wait_s, default the controller's) when the window is full.
+        The returned decision says what to build.
+        """
+        max_wait_s = self.max_wait_s if max_wait_s is None else max_wait_s
+        requested_sources = PODCAST_LENGTH_OPTIONS[length_preference]['max_sources']
+        requested = estimate(length_preference, search_results)
+        if not self.budgets:
+            return Decision('admit', length_preference, requested_sources, requested)
+
+        start = time.monotonic()
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                self._expire(now)
+                usage = self._usage()
+                if self._fits(usage, requested):
+                    return self._reserve(Decision('admit', length_preference, requested_sources, requested,
+                                                  waited_s=now - start), now)
+                wait = self._wait_for(requested, now)
+                waited = now - start
+                if wait is None or waited + wait > max_wait_s:
+                    break
+            logger.info(f"Admission: queueing {length_preference} request for {wait:.1f}s")
+            time.sleep(max(wait, 0.05))
+
+        with self._lock:
+            now = time.monotonic()
+            self._expire(now)
+            usage = self._usage()
+            for length, sources in self._options(length_preference, requested_sources):
+                candidate = estimate(length, search_results, sources)
+                if self._fits(usage, candidate):
+                    return self._reserve(Decision(
+                        'downgrade', length, sources, candidate, waited_s=now - start,
+                        reason=f"budget exhausted, downgraded from {length_preference}/{requested_sources} sources"), now)
+
+        logger.warning(f"Admission: rejecting {length_preference} request, estimate {requested}")
+        return Decision('reject', length_preference, requested_sources, requested, waited_s=now - start,
+                        reason="Generation budget exhausted, please try again in a few minutes.")
+
+    def _reserve(self, decision: Decision, now: float) -> Decision:
+        self._ledger.append((now, decision.estimate))
+        logger.info(f"Admission: {decision.action} {decision.length_preference} with "
+                    f"{decision.max_sources} sources, estimate {decision.estimate}")
+        return decision
+
+    def release(self, decision: Decision):
+        """
+        Return a reservation that turned out not to be needed (e.g. the
+        downgraded variant was already cached).
+        """
+        with self._lock:
+            for i, (_, est) in enumerate(self._ledger):
+                if est is decision.estimate:
+                    del self._ledger[i]
+                    return
+
+    def utilization(self) -> dict[str, float]:
+        with self._lock:
+            self._expire(time.monotonic())
+            usage = self._usage()
+        return {field: round(getattr(usage, field) / limit, 3) for field, limit in self.budgets.items()}
+
+
+controller = AdmissionController(ADMISSION_BUDGETS, ADMISSION_WINDOW_SECONDS, ADMISSION_MAX_WAIT_SECONDS)
@@ -4,17 +4,21 @@ import logging
 import random
 import asyncio
 
-from pydub import AudioSegment
-from google.cloud import texttospeech_v1beta1 as tts
+from src import metrics
+from src.clients import get_async_tts, run_blocking
+from src.config import TTS_DEADLINE_SECONDS
+from src.hedging import hedged
 
 logger = logging.getLogger(__name__)
 
-def _synthesize_chunk(text: str, voice_name: str) -> bytes:
+async def _synthesize_chunk(text: str, voice_name: str) -> bytes:
     """
     Synthesize a single line of dialogue as raw PCM (LINEAR16),
     with a small random prosody variation for natural pacing.
     """
-    client = tts.TextToSpeechClient()
+    from google.cloud import texttospeech_v1beta1 as tts
+    from src import pcm
+    client = get_async_tts()
 
     synthesis_input = tts.SynthesisInput(text=text)
     voice_params = tts.VoiceSelectionParams(
@@ -22,17 +26,27 @@ def _synthesize_chunk(text: str, voice_name: str) -> bytes:
         name=voice_name
     )
     audio_config = tts.AudioConfig(
-        audio_encoding=tts.AudioEncoding.MP3
+        audio_encoding=tts.AudioEncoding.LINEAR16,
+        sample_rate_hertz=pcm.SAMPLE_RATE
     )
 
     logger.info(f"Synthesizing chunk (first 30 chars): {text[:30]!r}")
-    response = client.synthesize_speech(
-        request={
-            "input": synthesis_input,
-            "voice": voice_params,
-            "audio_config": audio_config
-        }
-    )
+
+    async def _call():
+        return await client.synthesize_speech(
+            request={
+                "input": synthesis_input,
+                "voice": voice_params,
+                "audio_config": audio_config
+            }
+        )
+
+    try:
+        response, latency = await hedged("tts", _call, deadline=TTS_DEADLINE_SECONDS)
+    except Exception:
+        metrics.record_error("tts")
+        raise
+    metrics.record_call("tts", latency)
     return response.audio_content
 
 async def _synthesize_with_retry(text: str, voice_name: str,
@@ -43,58 +57,226 @@ async def _synthesize_with_retry(text: str, voice_name: str,
     """
     for attempt in range(max_retries):
         try:
-            return await asyncio.to_thread(_synthesize_chunk, text, voice_name)
+            return await _synthesize_chunk(text, voice_name)
         except Exception as e:
             logger.warning(f"TTS attempt {attempt+1}/{max_retries} failed: {e}")
             await asyncio.sleep(delay)
     logger.error(f"Failed to synthesize chunk after {max_retries} retries: {text[:30]!r}")
     return None
 
-async def _create_podcast(dialogue_script: str) -> bytes:
+async def _synthesize_line(text: str, voice_name: str, checkpoint=None) -> bytes | None:
     """
-    Turn the full “Jane:/John:” transcript into a single MP3:
-    1) Synthesize each line to raw PCM,
-    2) Convert to AudioSegment,
-    3) Stitch with short pauses,
-    4) Export once at high MP3 bitrate.
+    Synthesize one line, reusing the checkpointed audio from an earlier
+    attempt when there is one and checkpointing fresh audio as it lands.
+    """
+    if checkpoint is not None:
+        cached = await run_blocking('storage', checkpoint.load_line, text, voice_name)
+        if cached:
+            return cached
+
+    blob = await _synthesize_with_retry(text, voice_name)
+    if blob and checkpoint is not None:
+        try:
+            await run_blocking('storage', checkpoint.save_line, text, voice_name, blob)
+        except Exception as e:
+            logger.warning(f"Could not checkpoint line {text[:30]!r}: {e}")
+    return blob
+
+JANE_VOICE = "en-US-Chirp3-HD-Leda"
+CLARA_VOICE = "en-US-Chirp3-HD-Aoede"
+
+def _parse_line(line: str) -> tuple[str, str] | None:
+    """
+    Split a "Jane:"/"Clara:" script line into (text, voice_name).
+    Returns None for anything that is not a speaker turn.
+    """
+    if line.startswith("Jane:"):
+        return line.split(":", 1)[1].strip(), JANE_VOICE
+    if line.startswith("Clara:"):
+        return line.split(":", 1)[1].strip(), CLARA_VOICE
+    return None
+
+def _stitch(blobs: list[bytes | None], lines: list[dict]) -> tuple[bytes, dict]:
     """
+    Post-process the synthesized lines as whole PCM arrays (trim edge
+    silence, level each voice, insert uniform gaps) and export once
+    at high MP3 bitrate. Returns the MP3 and its chapter index.
+    """
+    from src import pcm
+
+    segments = [_trimmed(blob) for blob in blobs]
+    return _encode(pcm.level_voices(segments, [line['voice'] for line in lines]), lines)
+
+def _trimmed(blob: bytes | None):
+    """
+    Edge-trimmed PCM for one synthesized line. Failed lines become empty
+    segments so they keep their place and bounds line up with the script.
+    """
+    import numpy as np
+    from src import pcm
+    if not blob:
+        return np.zeros(0, dtype=np.float32)
+    return pcm.trim_silence(pcm.decode_wav(blob)[0])
+
+def _encode(leveled: list, lines: list[dict]) -> tuple[bytes, dict]:
+    """
+    Assemble leveled segments, export once to MP3 and index the lines.
+    """
+    from pydub import AudioSegment
+    from src import chapters, pcm
+    from src.config import PODCAST_BITRATE_KBPS
 
-    jane_voice = "en-US-Chirp3-HD-Leda"
-    clara_voice = "en-US-Chirp3-HD-Aoede"
+    final = pcm.assemble(leveled)
+    audio = AudioSegment(data=pcm.to_int16_bytes(final), sample_width=2,
+                         frame_rate=pcm.SAMPLE_RATE, channels=1)
+    out = io.BytesIO()
+    audio.export(out, format="mp3", bitrate=f"{PODCAST_BITRATE_KBPS}k")
+    mp3 = out.getvalue()
+    index = chapters.build_index(lines, pcm.segment_bounds(leveled), pcm.SAMPLE_RATE,
+                                 len(final), mp3)
+    return mp3, index
 
+def _decode_mp3(mp3: bytes):
+    """
+    Decode an episode back to mono float32 PCM at pcm.SAMPLE_RATE. ffmpeg
+    drops the encoder delay, so sample positions match the chapter index.
+    """
+    import numpy as np
+    from pydub import AudioSegment
+    from src import pcm
+    audio = AudioSegment.from_file(io.BytesIO(mp3), format="mp3")
+    audio = audio.set_frame_rate(pcm.SAMPLE_RATE).set_channels(1).set_sample_width(2)
+    return np.frombuffer(audio.raw_data, dtype='<i2').astype(np.float32) / 32768.0
+
+def _speaker_line(ln: str, text: str, voice: str) -> dict:
+    return {'speaker': ln.split(":", 1)[0], 'voice': voice, 'text': text}
+
+async def _create_podcast(dialogue_script: str, checkpoint=None) -> tuple[bytes, dict]:
+    """
+    Turn the full “Jane:/Clara:” transcript into a single MP3:
+    1) Synthesize each line to raw PCM,
+    2) Trim, level and space the PCM segments,
+    3) Export once at high MP3 bitrate, with a chapter index.
+    """
     # split out non-empty lines
     lines = [ln.strip() for ln in dialogue_script.splitlines() if ln.strip()]
     tasks = []
+    spoken = []
     for ln in lines:
-        if ln.startswith("Jane:"):
-            text = ln.split(":", 1)[1].strip()
-            voice = jane_voice
-        elif ln.startswith("Clara:"):
-            text = ln.split(":", 1)[1].strip()
-            voice = clara_voice
-        else:
+        parsed = _parse_line(ln)
+        if parsed is None:
             continue
-        tasks.append(asyncio.create_task(_synthesize_with_retry(text, voice)))
+        text, voice = parsed
+        spoken.append(_speaker_line(ln, text, voice))
+        tasks.append(asyncio.create_task(_synthesize_line(text, voice, checkpoint)))
 
     # run all TTS jobs
     blobs = await asyncio.gather(*tasks)
+    return _stitch(blobs, spoken)
+
+async def _create_podcast_from_stream(line_stream, checkpoint=None) -> tuple[str, bytes, dict]:
+    """
+    Consume an async iterator of script lines (e.g. review.stream_final_summary)
+    and queue each line for TTS the moment it arrives, so synthesis overlaps
+    with script generation. Returns the assembled script, the MP3 bytes and
+    the chapter index.
+    The finished script is checkpointed before waiting on the remaining TTS.
+    """
+    script_lines = []
+    tasks = []
+    spoken = []
+    async for ln in line_stream:
+        ln = ln.strip()
+        parsed = _parse_line(ln)
+        if parsed is None:
+            continue
+        text, voice = parsed
+        script_lines.append(ln)
+        spoken.append(_speaker_line(ln, text, voice))
+        tasks.append(asyncio.create_task(_synthesize_line(text, voice, checkpoint)))
 
-    # build the final AudioSegment
-    spacer = AudioSegment.silent(duration=600)
-    final = AudioSegment.empty()
-    for blob in blobs:
-        if blob:
-            seg = AudioSegment.from_mp3(io.BytesIO(blob))
-            final += seg + spacer
+    script = '\n\n\n'.join(script_lines)
+    logger.info(f"Script complete ({len(script_lines)} lines), waiting on remaining TTS jobs")
+    if checkpoint is not None and script:
+        try:
+            await run_blocking('storage', checkpoint.save, 'script', script)
+        except Exception as e:
+            logger.warning(f"Could not checkpoint script: {e}")
+    blobs = await asyncio.gather(*tasks)
+    return (script, *_stitch(blobs, spoken))
 
-    # export once to MP3 at 192 kbps
-    out = io.BytesIO()
-    final.export(out, format="mp3", bitrate="192k")
-    out.seek(0)
-    return out.read()
+def create_podcast(dialogue_script: str, checkpoint=None) -> tuple[bytes, dict]:
+    """
+    Public entry: run the async pipeline and return (MP3 bytes, chapter index).
+    """
+    return asyncio.run(_create_podcast(dialogue_script, checkpoint))
+
+def create_podcast_streaming(line_stream, checkpoint=None) -> tuple[str, bytes, dict]:
+    """
+    Public entry for the streaming path: synthesize lines as the script
+    streams in and return (script, MP3 bytes, chapter index).
+    """
+    return asyncio.run(_create_podcast_from_stream(line_stream, checkpoint))
+
+async def _resynthesize_podcast(dialogue_script: str, old_chapters: dict, old_mp3: bytes,
+                                checkpoint=None) -> tuple[bytes, dict, dict]:
+    """
+    Diff the new script against the lines recorded in the episode's chapter
+    index. Lines that are unchanged (by voice and text) are cut out of the
+    existing audio at their recorded bounds; only changed or inserted lines
+    go to TTS (or the line checkpoint). The result is re-assembled and
+    encoded once. Returns (MP3 bytes, chapter index, stats).
+    """
+    from difflib import SequenceMatcher
+    from src import chapters, pcm
+
+    spoken = []
+    for ln in (ln.strip() for ln in dialogue_script.splitlines()):
+        parsed = _parse_line(ln) if ln else None
+        if parsed is not None:
+            spoken.append(_speaker_line(ln, *parsed))
+
+    old_lines = old_chapters['lines']
+    old_keys = [line['line_key'] for line in old_lines]
+    new_keys = [chapters.line_key(line['text'], line['voice']) for line in spoken]
+
+    # new line index -> old line index, for lines that survived the edit
+    reuse = {}
+    for tag, i1, i2, j1, j2 in SequenceMatcher(a=old_keys, b=new_keys, autojunk=False).get_opcodes():
+        if tag == 'equal':
+            for offset in range(i2 - i1):
+                if old_lines[i1 + offset]['start_s'] is not None:
+                    reuse[j1 + offset] = i1 + offset
+
+    changed = [j for j in range(len(spoken)) if j not in reuse]
+    blobs = await asyncio.gather(*(_synthesize_line(spoken[j]['text'], spoken[j]['voice'], checkpoint)
+                                   for j in changed))
+    fresh = dict(zip(changed, (_trimmed(blob) for blob in blobs)))
+
+    # new lines are leveled among themselves; reused ones already are
+    if fresh:
+        leveled_fresh = pcm.level_voices(list(fresh.values()), [spoken[j]['voice'] for j in fresh])
+        fresh = dict(zip(fresh, leveled_fresh))
+
+    old_pcm = _decode_mp3(old_mp3) if reuse else None
+    segments = []
+    for j in range(len(spoken)):
+        if j in reuse:
+            line = old_lines[reuse[j]]
+            start = round(line['start_s'] * pcm.SAMPLE_RATE)
+            end = round(line['end_s'] * pcm.SAMPLE_RATE)
+            segments.append(old_pcm[start:end])
+        else:
+            segments.append(fresh[j])
+
+    stats = {'lines': len(spoken), 'reused': len(reuse), 'synthesized': len(changed)}
+    logger.info(f"Re-synthesis: {stats['synthesized']} changed lines, {stats['reused']} reused from existing audio")
+    return (*_encode(segments, spoken), stats)
 
-def create_podcast(dialogue_script: str) -> bytes:
+def resynthesize_podcast(dialogue_script: str, old_chapters: dict, old_mp3: bytes,
+                         checkpoint=None) -> tuple[bytes, dict, dict]:
     """
-    Public entry: run the async pipeline and return MP3 bytes.
+    Public entry for script edits: rebuild the episode touching only the
+    lines that changed, and return (MP3 bytes, chapter index, stats).
     """
-    return asyncio.run(_create_podcast(dialogue_script))
\ No newline at end of file
+    return asyncio.run(_resynthesize_podcast(dialogue_script, old_chapters, old_mp3, checkpoint))
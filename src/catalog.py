@@ -0,0 +1,177 @@
+import json
+import logging
+import sqlite3
+import threading
+import time
+from contextlib import contextmanager
+
+from src.config import CATALOG_DB_PATH, PODCAST_BITRATE_KBPS
+from src.storage import PODCAST_BLOB_SUFFIX, MANIFEST_BLOB_SUFFIX, parse_podcast_path, movie_from_directory
+
+logger = logging.getLogger(__name__)
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS episodes (
+    podcast_path      TEXT PRIMARY KEY,
+    movie             TEXT NOT NULL,
+    year              INTEGER,
+    allow_spoilers    INTEGER NOT NULL,
+    length_preference TEXT NOT NULL,
+    duration_sec      REAL,
+    size_bytes        INTEGER,
+    created_at        REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_episodes_created ON episodes (created_at DESC);
+CREATE INDEX IF NOT EXISTS idx_episodes_filters ON episodes (allow_spoilers, length_preference, year);
+CREATE TABLE IF NOT EXISTS channels (
+    channel  TEXT PRIMARY KEY,
+    useful   INTEGER NOT NULL DEFAULT 0,
+    rejected INTEGER NOT NULL DEFAULT 0
+);
+"""
+
+_lock = threading.Lock()
+
+
+@contextmanager
+def _connect(db_path: str = CATALOG_DB_PATH):
+    """
+    Open the index, commit on success and always close the connection.
+    """
+    conn = sqlite3.connect(db_path, timeout=10)
+    conn.row_factory = sqlite3.Row
+    try:
+        conn.executescript(_SCHEMA)
+        with conn:
+            yield conn
+    finally:
+        conn.close()
+
+
+def estimate_duration(size_bytes: int) -> float:
+    """
+    Episodes are exported as constant-bitrate MP3, so duration follows from
+    size. Only a fallback for episodes published without a duration.
+    """
+    return size_bytes * 8 / (PODCAST_BITRATE_KBPS * 1000)
+
+
+def record_episode(podcast_path: str, movie: str, year: int | None, allow_spoilers: bool,
+                   length_preference: str, size_bytes: int, created_at: float | None = None,
+                   duration_sec: float | None = None, db_path: str = CATALOG_DB_PATH):
+    """
+    Insert or update a single episode. Called by app.main right after upload.
+    """
+    if duration_sec is None:
+        duration_sec = estimate_duration(size_bytes)
+    row = (podcast_path, movie, year, int(allow_spoilers), length_preference,
+           duration_sec, size_bytes, created_at or time.time())
+    with _lock, _connect(db_path) as conn:
+        conn.execute(
+            "INSERT OR REPLACE INTO episodes VALUES (?, ?, ?, ?, ?, ?, ?, ?)", row)
+    logger.info(f"Catalog updated with '{podcast_path}'")
+
+
+def rebuild_from_bucket(bucket, db_path: str = CATALOG_DB_PATH) -> int:
+    """
+    Re-create the index from scratch by listing podcast objects in the bucket.
+    Durations come from the episode manifests where they record one.
+    Returns the number of episodes indexed.
+    """
+    from src.identity import titles_by_key
+    titles = titles_by_key(bucket)
+    durations = {}
+    for blob in bucket.list_blobs(match_glob=f"**{MANIFEST_BLOB_SUFFIX}"):
+        try:
+            manifest = json.loads(blob.download_as_bytes())
+        except ValueError:
+            continue
+        if manifest.get('duration_s') is not None:
+            durations[manifest['podcast']] = manifest['duration_s']
+
+    rows = []
+    for blob in bucket.list_blobs(match_glob=f"**{PODCAST_BLOB_SUFFIX}"):
+        parsed = parse_podcast_path(blob.name)
+        if parsed is None:
+            continue
+        movie, year = titles.get(parsed['directory']) or movie_from_directory(parsed['directory'])
+        created = blob.time_created.timestamp() if blob.time_created else time.time()
+        duration = durations.get(blob.name) or estimate_duration(blob.size or 0)
+        rows.append((blob.name, movie, year, int(parsed['allow_spoilers']),
+                     parsed['length_preference'], duration, blob.size or 0, created))
+
+    with _lock, _connect(db_path) as conn:
+        conn.execute("DELETE FROM episodes")
+        conn.executemany(
+            "INSERT OR REPLACE INTO episodes VALUES (?, ?, ?, ?, ?, ?, ?, ?)", rows)
+    logger.info(f"Catalog rebuilt from bucket with {len(rows)} episodes")
+    return len(rows)
+
+
+def _where(search: str | None = None, allow_spoilers: bool | None = None,
+           length_preferences: list[str] | None = None,
+           year_range: tuple[int, int] | None = None) -> tuple[str, list]:
+    clauses, params = [], []
+    if search:
+        clauses.append("movie LIKE ?")
+        params.append(f"%{search}%")
+    if allow_spoilers is not None:
+        clauses.append("allow_spoilers = ?")
+        params.append(int(allow_spoilers))
+    if length_preferences:
+        clauses.append(f"length_preference IN ({', '.join('?' * len(length_preferences))})")
+        params.extend(length_preferences)
+    if year_range:
+        clauses.append("year BETWEEN ? AND ?")
+        params.extend(year_range)
+    return (" WHERE " + " AND ".join(clauses)) if clauses else "", params
+
+
+def count_episodes(db_path: str = CATALOG_DB_PATH, **filters) -> int:
+    where, params = _where(**filters)
+    with _connect(db_path) as conn:
+        return conn.execute(f"SELECT COUNT(*) FROM episodes{where}", params).fetchone()[0]
+
+
+def query_episodes(limit: int = 12, offset: int = 0, db_path: str = CATALOG_DB_PATH,
+                   **filters) -> list[dict]:
+    """
+    Return one page of episodes, newest first, with filters applied in SQL.
+    """
+    where, params = _where(**filters)
+    with _connect(db_path) as conn:
+        rows = conn.execute(
+            f"SELECT * FROM episodes{where} ORDER BY created_at DESC LIMIT ? OFFSET ?",
+            params + [limit, offset]).fetchall()
+    return [dict(r) for r in rows]
+
+
+def year_bounds(db_path: str = CATALOG_DB_PATH) -> tuple[int, int] | None:
+    with _connect(db_path) as conn:
+        lo, hi = conn.execute("SELECT MIN(year), MAX(year) FROM episodes").fetchone()
+    return (lo, hi) if lo is not None else None
+
+
+def record_channel_results(outcomes: list[tuple[str, bool]], db_path: str = CATALOG_DB_PATH):
+    """
+    Track, per channel, how often its videos produced a usable review summary.
+    `outcomes` is a list of (channel, useful) pairs.
+    """
+    with _lock, _connect(db_path) as conn:
+        for channel, useful in outcomes:
+            conn.execute("INSERT OR IGNORE INTO channels (channel) VALUES (?)", (channel,))
+            column = "useful" if useful else "rejected"
+            conn.execute(f"UPDATE channels SET {column} = {column} + 1 WHERE channel = ?", (channel,))
+
+
+def channel_history(channels: list[str], db_path: str = CATALOG_DB_PATH) -> dict[str, tuple[int, int]]:
+    """
+    Return {channel: (useful, rejected)} for the channels that have any history.
+    """
+    if not channels:
+        return {}
+    with _connect(db_path) as conn:
+        rows = conn.execute(
+            f"SELECT channel, useful, rejected FROM channels WHERE channel IN ({', '.join('?' * len(channels))})",
+            channels).fetchall()
+    return {row['channel']: (row['useful'], row['rejected']) for row in rows}
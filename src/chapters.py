@@ -0,0 +1,136 @@
+import logging
+
+from src.checkpoint import line_key
+
+logger = logging.getLogger(__name__)
+
+INDEX_VERSION = 1
+
+DECODER_DELAY = 529          # samples every Layer III decoder adds
+DEFAULT_ENCODER_DELAY = 576  # LAME's (and libmp3lame via ffmpeg's) usual delay
+
+# MPEG audio header tables, indexed by the header's version bits
+_BITRATES_KBPS = {
+    'mpeg1': [0, 32, 40, 48, 56, 64, 80, 96, 112, 128, 160, 192, 224, 256, 320],
+    'mpeg2': [0, 8, 16, 24, 32, 40, 48, 56, 64, 80, 96, 112, 128, 144, 160],
+}
+_SAMPLE_RATES = {3: ('mpeg1', [44100, 48000, 32000]),
+                 2: ('mpeg2', [22050, 24000, 16000]),
+                 0: ('mpeg2', [11025, 12000, 8000])}  # MPEG-2.5
+
+
+def _skip_id3(data: bytes) -> int:
+    if data[:3] != b'ID3' or len(data) < 10:
+        return 0
+    size = 0
+    for byte in data[6:10]:
+        size = (size << 7) | (byte & 0x7F)
+    return 10 + size
+
+
+def _tag_delay(frame: bytes) -> int | None:
+    """
+    Encoder delay from the LAME-format tag that follows a Xing/Info header.
+    LAME and ffmpeg ("Lavc...") both write it; only the encoder string differs.
+    """
+    tag = max(frame.find(b'Xing'), frame.find(b'Info'))
+    if tag < 0 or tag + 8 > len(frame):
+        return None
+    flags = int.from_bytes(frame[tag + 4:tag + 8], 'big')
+    # optional frame count, byte count, seek table and quality fields
+    pos = tag + 8 + 4 * bool(flags & 1) + 4 * bool(flags & 2) + 100 * bool(flags & 4) + 4 * bool(flags & 8)
+    # 9-byte encoder string, then 12 bytes of version/gain fields before the delay
+    if pos + 24 > len(frame) or not frame[pos:pos + 9].strip(b'\0'):
+        return None
+    return int.from_bytes(frame[pos + 21:pos + 24], 'big') >> 12
+
+
+def mp3_frames(data: bytes) -> tuple[list[int], int, int, int]:
+    """
+    Scan a Layer III stream and return (byte offset of each audio frame,
+    samples per frame, total delay in samples, bitrate in kbps of the first
+    audio frame). The leading Xing/Info frame, if any, is skipped and its
+    encoder delay read; without one LAME's default delay is assumed.
+    """
+    offsets, samples_per_frame, bitrate_kbps = [], 1152, 0
+    encoder_delay = None
+    pos = _skip_id3(data)
+    first = True
+    while pos + 4 <= len(data):
+        header = int.from_bytes(data[pos:pos + 4], 'big')
+        version_bits = (header >> 19) & 0x3
+        if (header >> 21) != 0x7FF or version_bits not in _SAMPLE_RATES or ((header >> 17) & 0x3) != 1:
+            pos += 1  # not a Layer III frame header; resync
+            continue
+        version, rates = _SAMPLE_RATES[version_bits]
+        bitrate_index = (header >> 12) & 0xF
+        rate_index = (header >> 10) & 0x3
+        if bitrate_index in (0, 15) or rate_index == 3:
+            pos += 1
+            continue
+        bitrate = _BITRATES_KBPS[version][bitrate_index] * 1000
+        sample_rate = rates[rate_index]
+        padding = (header >> 9) & 0x1
+        samples_per_frame = 1152 if version == 'mpeg1' else 576
+        length = samples_per_frame // 8 * bitrate // sample_rate + padding
+
+        frame = data[pos:pos + length]
+        if first and (b'Xing' in frame or b'Info' in frame):
+            encoder_delay = _tag_delay(frame)
+        else:
+            if not offsets:
+                bitrate_kbps = bitrate // 1000
+            offsets.append(pos)
+        first = False
+        pos += length
+    if encoder_delay is None:
+        encoder_delay = DEFAULT_ENCODER_DELAY
+    return offsets, samples_per_frame, encoder_delay + DECODER_DELAY, bitrate_kbps
+
+
+def build_index(lines: list[dict], bounds: list[tuple[int, int] | None], sample_rate: int,
+                total_samples: int, mp3: bytes) -> dict:
+    """
+    Chapter index for an assembled episode: one entry per script line with its
+    start/end time and the MP3 byte range holding it, so players can fetch
+    and seek to a single line with an HTTP range request.
+
+    lines: [{'speaker', 'voice', 'text'}] in script order; bounds: the
+    matching pcm.segment_bounds() (None for lines that produced no audio).
+    """
+    offsets, samples_per_frame, delay, bitrate_kbps = mp3_frames(mp3)
+    if not offsets:
+        logger.warning("No MP3 frames found; chapter byte offsets omitted")
+
+    def _byte_range(start: int, end: int) -> tuple[int | None, int | None]:
+        if not offsets:
+            return None, None
+        # one frame early: Layer III frames can borrow bits from the previous frame
+        first = min(max((start + delay) // samples_per_frame - 1, 0), len(offsets) - 1)
+        last = (end + delay - 1) // samples_per_frame + 1
+        return offsets[first], offsets[last] if last < len(offsets) else len(mp3)
+
+    entries = []
+    for i, (line, bound) in enumerate(zip(lines, bounds)):
+        entry = {
+            'index': i,
+            'speaker': line['speaker'],
+            'text': line['text'],
+            'line_key': line_key(line['text'], line['voice']),
+            'start_s': None, 'end_s': None, 'byte_start': None, 'byte_end': None,
+        }
+        if bound is not None:
+            start, end = bound
+            entry['start_s'] = round(start / sample_rate, 3)
+            entry['end_s'] = round(end / sample_rate, 3)
+            entry['byte_start'], entry['byte_end'] = _byte_range(start, end)
+        entries.append(entry)
+
+    return {
+        'version': INDEX_VERSION,
+        'sample_rate': sample_rate,
+        'bitrate_kbps': bitrate_kbps,
+        'duration_s': round(total_samples / sample_rate, 3),
+        'mp3_bytes': len(mp3),
+        'lines': entries,
+    }
@@ -0,0 +1,73 @@
+import hashlib
+import logging
+import pickle
+
+logger = logging.getLogger(__name__)
+
+
+def _digest(*parts: str) -> str:
+    return hashlib.sha1("\x1f".join(parts).encode("utf-8")).hexdigest()
+
+
+def line_key(text: str, voice: str) -> str:
+    """
+    Content address of one synthesized line, shared with the chapter index.
+    """
+    return _digest(voice, text)
+
+
+class Checkpoint:
+    """
+    Stage outputs for one episode variant, stored under
+    <directory>/checkpoints/<variant>/ so a later attempt can resume
+    from whatever the previous one finished.
+
+    Synthesized lines are content-addressed by (voice, text) and shared
+    across every variant of the movie in <directory>/checkpoints/lines/.
+    """
+
+    def __init__(self, bucket, directory: str, variant: str):
+        self.bucket = bucket
+        self.prefix = f"{directory}/checkpoints/{variant}"
+        self.lines_prefix = f"{directory}/checkpoints/lines"
+
+    def _download(self, name: str) -> bytes | None:
+        from google.api_core.exceptions import NotFound
+        try:
+            return self.bucket.blob(name).download_as_bytes()
+        except NotFound:
+            return None
+
+    def load(self, stage: str):
+        raw = self._download(f"{self.prefix}/{stage}.pkl")
+        if raw is None:
+            return None
+        logger.info(f"Resuming '{stage}' from checkpoint {self.prefix}")
+        return pickle.loads(raw)
+
+    def save(self, stage: str, obj):
+        self.bucket.blob(f"{self.prefix}/{stage}.pkl").upload_from_string(
+            pickle.dumps(obj), content_type='application/octet-stream')
+
+    def load_items(self, stage: str) -> dict:
+        """
+        Load every item saved with save_item for this stage, keyed by item key.
+        """
+        items = {}
+        for blob in self.bucket.list_blobs(prefix=f"{self.prefix}/{stage}/"):
+            key, value = pickle.loads(blob.download_as_bytes())
+            items[key] = value
+        if items:
+            logger.info(f"Resuming {len(items)} '{stage}' items from checkpoint {self.prefix}")
+        return items
+
+    def save_item(self, stage: str, key: str, value):
+        self.bucket.blob(f"{self.prefix}/{stage}/{_digest(key)}.pkl").upload_from_string(
+            pickle.dumps((key, value)), content_type='application/octet-stream')
+
+    def load_line(self, text: str, voice: str) -> bytes | None:
+        return self._download(f"{self.lines_prefix}/{line_key(text, voice)}.wav")
+
+    def save_line(self, text: str, voice: str, audio: bytes):
+        self.bucket.blob(f"{self.lines_prefix}/{line_key(text, voice)}.wav").upload_from_string(
+            audio, content_type='audio/wav')
@@ -0,0 +1,90 @@
+import asyncio
+import functools
+import threading
+import weakref
+from concurrent.futures import ThreadPoolExecutor
+
+from src.config import GEMINI_API_KEY, GEMINI_MODEL_NAME, TRANSCRIPT_POOL_SIZE, SEARCH_POOL_SIZE, STORAGE_POOL_SIZE
+
+# Provider SDKs (genai, texttospeech, storage) are imported on first use rather
+# than at module import, so a Cloud Run cold start only pays for what the first
+# request actually touches.
+_lock = threading.Lock()
+_genai_configured = False
+_storage_client = None
+
+# gRPC asyncio channels are bound to the event loop that created them, and the
+# pipeline runs several short-lived loops (one per asyncio.run, one per Streamlit
+# session thread), so async clients are cached per running loop.
+_loop_clients = weakref.WeakKeyDictionary()
+
+_executors = {
+    'transcripts': ThreadPoolExecutor(max_workers=TRANSCRIPT_POOL_SIZE, thread_name_prefix='transcripts'),
+    'search': ThreadPoolExecutor(max_workers=SEARCH_POOL_SIZE, thread_name_prefix='search'),
+    'storage': ThreadPoolExecutor(max_workers=STORAGE_POOL_SIZE, thread_name_prefix='storage'),
+}
+
+
+def _clients_for_running_loop() -> dict:
+    loop = asyncio.get_running_loop()
+    clients = _loop_clients.get(loop)
+    if clients is None:
+        clients = _loop_clients[loop] = {}
+    return clients
+
+
+def _genai():
+    global _genai_configured
+    import google.generativeai as genai
+    with _lock:
+        if not _genai_configured:
+            genai.configure(api_key=GEMINI_API_KEY)
+            _genai_configured = True
+    return genai
+
+
+def get_async_llm(model_name: str = GEMINI_MODEL_NAME):
+    """
+    GenerativeModel whose generate_content_async runs on a native gRPC
+    asyncio client owned by the current event loop.
+    """
+    clients = _clients_for_running_loop()
+    key = ('llm', model_name)
+    if key not in clients:
+        genai = _genai()
+        from google.ai import generativelanguage as glm
+        model = genai.GenerativeModel(model_name)
+        # genai caches one process-wide async client; give each loop its own
+        model._async_client = glm.GenerativeServiceAsyncClient(
+            client_options={'api_key': GEMINI_API_KEY})
+        clients[key] = model
+    return clients[key]
+
+
+def get_async_tts():
+    clients = _clients_for_running_loop()
+    if 'tts' not in clients:
+        from google.cloud import texttospeech_v1beta1 as tts
+        clients['tts'] = tts.TextToSpeechAsyncClient()
+    return clients['tts']
+
+
+def get_storage_client():
+    """
+    Process-wide GCS client, built on first use.
+    """
+    global _storage_client
+    with _lock:
+        if _storage_client is None:
+            from google.cloud import storage
+            _storage_client = storage.Client()
+    return _storage_client
+
+
+async def run_blocking(pool: str, fn, *args, **kwargs):
+    """
+    Run a blocking call on one of the named, separately sized pools
+    instead of the shared default executor.
+    """
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(_executors[pool], functools.partial(fn, *args, **kwargs))
@@ -1,7 +1,6 @@
 import os
 import logging
 from dotenv import load_dotenv
-import google.generativeai as genai
 # from google.oauth2.service_account import Credentials
 
 load_dotenv()
@@ -15,34 +14,153 @@ def setup_logging():
                         datefmt='%Y-%m-%d %H:%M:%S')
     return logging.getLogger(__name__)
 
-genai.configure(api_key=os.environ.get("GEMINI_API_KEY"))
-
 proxy = os.environ.get('PROXY_ADDRESS') #uncomment after commented for local
 # proxy = None
 
-llm = genai.GenerativeModel("gemini-2.0-flash")
+# How each source review is condensed before the dialogue prompt:
+# "points" extracts a short JSON list of typed points per review (fast, small
+# final prompt); "prose" asks for a ~1000-word summary per review.
+SUMMARY_MODE = os.environ.get('SUMMARY_MODE', 'points')
+
+# Provider SDKs are imported and configured lazily in src/clients.py
+GEMINI_API_KEY = os.environ.get("GEMINI_API_KEY")
+GEMINI_MODEL_NAME = "gemini-2.0-flash"
+
+# Per-stage model routing. Callers of get_gemini_response pick a route by
+# stage name; high fan-out stages can run on cheaper, faster models.
+LLM_ROUTES = {
+    "relevance": {        # one-word yes/no check per search result
+        "model": os.environ.get("LLM_RELEVANCE_MODEL", "gemini-2.0-flash-lite"),
+        "generation_config": {"max_output_tokens": 8, "temperature": 0.0},
+        "deadline_s": 15,
+    },
+    "review_summary": {   # one call per selected source video
+        "model": os.environ.get("LLM_REVIEW_SUMMARY_MODEL", GEMINI_MODEL_NAME),
+        "generation_config": {"max_output_tokens": 2048, "temperature": 0.3},
+        "deadline_s": 90,
+    },
+    "review_points": {    # structured per-review extraction (SUMMARY_MODE=points)
+        "model": os.environ.get("LLM_REVIEW_POINTS_MODEL", GEMINI_MODEL_NAME),
+        "generation_config": {"max_output_tokens": 1024, "temperature": 0.2,
+                              "response_mime_type": "application/json"},
+        "deadline_s": 60,
+    },
+    "final_dialogue": {   # the Jane/Clara script
+        "model": os.environ.get("LLM_FINAL_DIALOGUE_MODEL", GEMINI_MODEL_NAME),
+        "generation_config": {"max_output_tokens": 8192, "temperature": 0.9},
+        "deadline_s": 60,     # streamed: max wait for the next chunk
+    },
+    "default": {
+        "model": GEMINI_MODEL_NAME,
+        "generation_config": {},
+        "deadline_s": 120,
+    },
+}
+
+# Headless HTTP API (api.py): pipelines running at once, jobs allowed to
+# wait behind them before submissions get 429, finished jobs kept for polling
+API_MAX_CONCURRENT_JOBS = int(os.environ.get('API_MAX_CONCURRENT_JOBS', 4))
+API_MAX_QUEUED_JOBS = int(os.environ.get('API_MAX_QUEUED_JOBS', 32))
+API_JOB_HISTORY = int(os.environ.get('API_JOB_HISTORY', 1024))
+
+# Strip caption artifacts, fillers, repeats, sponsor reads and intro/outro
+# boilerplate from transcripts before summarization (src/preprocess.py)
+TRANSCRIPT_PREPROCESS = os.environ.get('TRANSCRIPT_PREPROCESS', 'true').lower() == 'true'
+
+# Admission control for cache-miss generations (src/admission.py): estimated
+# spend admitted per rolling window, by resource; 0 leaves a resource unlimited.
+# Requests over budget wait up to ADMISSION_MAX_WAIT_SECONDS, then are
+# downgraded (fewer sources, down to ADMISSION_MIN_SOURCES, or a shorter
+# length) and rejected only if nothing fits.
+ADMISSION_WINDOW_SECONDS = float(os.environ.get('ADMISSION_WINDOW_SECONDS', 60))
+ADMISSION_BUDGETS = {
+    'llm_calls': int(os.environ.get('ADMISSION_LLM_CALLS', 0)),
+    'input_tokens': int(os.environ.get('ADMISSION_INPUT_TOKENS', 0)),
+    'output_tokens': int(os.environ.get('ADMISSION_OUTPUT_TOKENS', 0)),
+    'tts_chars': int(os.environ.get('ADMISSION_TTS_CHARS', 0)),
+}
+ADMISSION_MAX_WAIT_SECONDS = float(os.environ.get('ADMISSION_MAX_WAIT_SECONDS', 20))
+ADMISSION_MIN_SOURCES = int(os.environ.get('ADMISSION_MIN_SOURCES', 3))
+
+# Hedged calls: once a call has run longer than this latency percentile of
+# its route's recent history, a duplicate is sent and the first reply wins.
+# 0 disables hedging. Routes need HEDGE_MIN_SAMPLES latencies before hedging.
+HEDGE_QUANTILE = float(os.environ.get('HEDGE_QUANTILE', 0.95))
+HEDGE_MIN_SAMPLES = int(os.environ.get('HEDGE_MIN_SAMPLES', 20))
+TTS_DEADLINE_SECONDS = int(os.environ.get('TTS_DEADLINE_SECONDS', 30))
 GCS_BUCKET_NAME = 'msds603_film_podcast'
 
+# Local SQLite index of generated episodes, rebuildable from the bucket
+CATALOG_DB_PATH = os.environ.get('CATALOG_DB_PATH', '/tmp/cinecast_catalog.sqlite3')
+# Episodes are exported at 24 kHz mono (MPEG-2 Layer III), whose bitrates top out at 160 kbps
+PODCAST_BITRATE_KBPS = 160
+
+# Episode freshness by title age: (max years since release, TTL in days).
+# First matching row wins; older titles (or unknown years) never go stale.
+# A stale episode is refreshed incrementally: only new source videos are
+# fetched and summarized, then the dialogue and audio are rebuilt. The
+# stale episode keeps being served while that runs in the background.
+FRESHNESS_POLICIES = [
+    (0, 1),    # released this year: refresh daily
+    (1, 7),    # last year: weekly
+    (3, 30),   # up to three years old: monthly
+]
+REFRESH_POOL_SIZE = int(os.environ.get('REFRESH_POOL_SIZE', 2))
+
+# In-process result memoization: handles are tiny, payloads are bounded by bytes
+MEMO_MAX_HANDLES = int(os.environ.get('MEMO_MAX_HANDLES', 1024))
+MEMO_MAX_PAYLOAD_BYTES = int(os.environ.get('MEMO_MAX_PAYLOAD_BYTES', 128 * 1024 * 1024))
+
+# Gemini response cache: off | cache | record | replay (see src/llm_cache.py)
+LLM_CACHE_MODE = os.environ.get('LLM_CACHE_MODE', 'off')
+LLM_CACHE_DIR = os.environ.get('LLM_CACHE_DIR', '/tmp/cinecast_llm_cache')
+LLM_CACHE_TTL_SECONDS = int(os.environ.get('LLM_CACHE_TTL_SECONDS', 7 * 24 * 3600))
+
+# Dedicated thread pools for the calls that have no async client.
+# Sized separately so a burst of transcript fetches can't starve searches.
+TRANSCRIPT_POOL_SIZE = int(os.environ.get('TRANSCRIPT_POOL_SIZE', 16))
+SEARCH_POOL_SIZE = int(os.environ.get('SEARCH_POOL_SIZE', 4))
+STORAGE_POOL_SIZE = int(os.environ.get('STORAGE_POOL_SIZE', 8))
+
+# Background publishing of finished episodes
+UPLOAD_POOL_SIZE = int(os.environ.get('UPLOAD_POOL_SIZE', 4))
+UPLOAD_MAX_RETRIES = int(os.environ.get('UPLOAD_MAX_RETRIES', 5))
+UPLOAD_CHUNK_BYTES = 1024 * 1024  # resumable upload chunk, must be a multiple of 256 KiB
+
+# Transcript fetching through the proxy: one keep-alive session, capped per host
+TRANSCRIPT_HOST_CONCURRENCY = int(os.environ.get('TRANSCRIPT_HOST_CONCURRENCY', 8))
+TRANSCRIPT_MAX_RETRIES = int(os.environ.get('TRANSCRIPT_MAX_RETRIES', 3))
+TRANSCRIPT_TIMEOUT_SECONDS = float(os.environ.get('TRANSCRIPT_TIMEOUT_SECONDS', 20))
+
 
 # Podcast Length Configuration
 PODCAST_LENGTH_OPTIONS = {
     "Clip": {
         "prompt_instruction": "under 500 words",
+        "target_words": 450,  # used for cost/latency estimates
         "ui_label": "Clip (~3 min)",
         "help_text": "A quick glimpse — perfect for when you're short on time.",
-        "filename_suffix": "_clip"
+        "filename_suffix": "_clip",
+        "max_sources": 4,     # top-K transcripts sent to summarization
+        "source_quorum": 6    # stop fetching once this many good transcripts are in
     },
     "Reel": {
         "prompt_instruction": "between 700 and 1100 words",
+        "target_words": 900,
         "ui_label": "Reel (~7 min)",
         "help_text": "A fast-paced review you can enjoy with your coffee.",
-        "filename_suffix": "_reel"
+        "filename_suffix": "_reel",
+        "max_sources": 7,
+        "source_quorum": 10
     },
     "Feature": {
         "prompt_instruction": "between 1500 and 2000 words", # Current default
+        "target_words": 1750,
         "ui_label": "Feature (~12 min) - Default",
         "help_text": "The full movie experience — detailed, thoughtful, and complete.",
-        "filename_suffix": "" # No suffix for default to match existing cache
+        "filename_suffix": "", # No suffix for default to match existing cache
+        "max_sources": 12,
+        "source_quorum": 16
     }
     # "Epic": { Temporarily disabled due to length instructions not being followed
     #     "prompt_instruction": "between 2500 and 3500 words",
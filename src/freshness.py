@@ -0,0 +1,29 @@
+import time
+from datetime import date
+
+from src.config import FRESHNESS_POLICIES
+from src.storage import split_title_year
+
+
+def episode_ttl_seconds(movie: str, today: date | None = None) -> float | None:
+    """
+    TTL for an episode of `movie` ("Title (YYYY)"), or None if it never expires.
+    """
+    _, year = split_title_year(movie)
+    if year is None:
+        return None
+    age = (today or date.today()).year - year
+    for max_age, ttl_days in FRESHNESS_POLICIES:
+        if age <= max_age:
+            return ttl_days * 24 * 3600
+    return None
+
+
+def is_stale(movie: str, built_at: float | None) -> bool:
+    """
+    True if an episode built at `built_at` (epoch seconds) is past its TTL.
+    """
+    ttl = episode_ttl_seconds(movie)
+    if ttl is None or built_at is None:
+        return False
+    return time.time() - built_at > ttl
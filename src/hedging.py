@@ -0,0 +1,57 @@
+import asyncio
+import logging
+import time
+
+from src import metrics
+from src.config import HEDGE_QUANTILE, HEDGE_MIN_SAMPLES
+
+logger = logging.getLogger(__name__)
+
+
+async def hedged(route: str, call, deadline: float | None = None):
+    """
+    Await call() under a deadline, hedging stragglers: if the first attempt
+    is still running after the route's HEDGE_QUANTILE latency, a duplicate
+    is started and whichever succeeds first wins; the other is cancelled.
+
+    Returns (result, end-to-end latency from the first attempt's start, as
+    the caller saw it, including any hedging delay). Raises TimeoutError
+    when nothing succeeds before the deadline, or the last attempt's error.
+    """
+    hedge_after = metrics.latency_quantile(route, HEDGE_QUANTILE, HEDGE_MIN_SAMPLES) if HEDGE_QUANTILE else None
+    loop = asyncio.get_running_loop()
+    give_up_at = loop.time() + deadline if deadline else None
+
+    start = time.perf_counter()
+    primary = asyncio.ensure_future(call())
+    attempts = [primary]
+    hedge = None
+    try:
+        while True:
+            remaining = give_up_at - loop.time() if give_up_at is not None else None
+            wait_for = remaining
+            if hedge is None and hedge_after is not None:
+                wait_for = hedge_after if remaining is None else min(hedge_after, remaining)
+            if wait_for is not None and wait_for <= 0:
+                metrics.record_timeout(route)
+                raise TimeoutError(f"{route} call exceeded its {deadline}s deadline")
+
+            done, _ = await asyncio.wait(attempts, timeout=wait_for, return_when=asyncio.FIRST_COMPLETED)
+            for attempt in done:
+                attempts.remove(attempt)
+                if attempt.exception() is None:
+                    if hedge is not None:
+                        metrics.record_hedge(route, won=attempt is hedge)
+                    return attempt.result(), time.perf_counter() - start
+                if not attempts:
+                    # nothing left in flight: let the caller's retry loop handle it
+                    raise attempt.exception()
+
+            if not done and hedge is None and hedge_after is not None and (
+                    give_up_at is None or loop.time() < give_up_at):
+                logger.info(f"Hedging {route} call after {hedge_after:.2f}s")
+                hedge = asyncio.ensure_future(call())
+                attempts.append(hedge)
+    finally:
+        for attempt in attempts:
+            attempt.cancel()
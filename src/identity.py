@@ -0,0 +1,230 @@
+"""
+Canonical movie identity for cache keys.
+
+Episodes are stored under a key that does not depend on how the title was
+typed: the IMDb ID when one is known ("tt0133093"), otherwise a normalized
+slug ("the_matrix_1999"). Slugs that have been seen alongside an IMDb ID are
+recorded in an alias index in the bucket, so later requests without an ID
+still land on the same key.
+
+One-time migration of episodes stored under the old
+`movie.lower().replace(' ', '_')` directories:
+
+    python -m src.identity --dry-run
+    python -m src.identity              # copy onto the new keys, keep originals
+    python -m src.identity --delete     # ...and remove the originals
+"""
+import argparse
+import json
+import logging
+import re
+import threading
+import unicodedata
+
+logger = logging.getLogger(__name__)
+
+ALIAS_PREFIX = "_aliases/"
+_IMDB_ID = re.compile(r'^tt\d{7,}$')
+MANIFEST_SUFFIX = "_manifest.json"
+_LEGACY_SUFFIXES = ("_podcast.mp3", "_review_text.pkl", "_source_videos.pkl", MANIFEST_SUFFIX)
+
+_aliases: dict[str, str] = {}
+_aliases_lock = threading.Lock()
+
+
+def slugify(movie: str) -> str:
+    """
+    "The Matrix (1999)", "the matrix 1999" and "The  Matrix: (1999)" all
+    become "the_matrix_1999". Only [a-z0-9_] survives, so the slug is
+    always a single safe path segment.
+    """
+    text = unicodedata.normalize('NFKD', movie).encode('ascii', 'ignore').decode('ascii')
+    text = text.lower().replace('&', ' and ')
+    text = re.sub(r"['’`]", '', text)
+    return re.sub(r'[^a-z0-9]+', '_', text).strip('_') or 'untitled'
+
+
+def is_imdb_id(value: str | None) -> bool:
+    return bool(value) and bool(_IMDB_ID.match(value))
+
+
+def _alias_path(slug: str) -> str:
+    return f"{ALIAS_PREFIX}{slug}.json"
+
+
+def _load_alias(bucket, slug: str) -> dict | None:
+    from google.api_core.exceptions import NotFound
+    try:
+        return json.loads(bucket.blob(_alias_path(slug)).download_as_bytes())
+    except NotFound:
+        return None
+
+
+def record_alias(bucket, movie: str, key: str):
+    from src.storage import split_title_year
+    slug = slugify(movie)
+    title, year = split_title_year(movie)
+    bucket.blob(_alias_path(slug)).upload_from_string(
+        json.dumps({'key': key, 'title': title, 'year': year}), content_type='application/json')
+    with _aliases_lock:
+        _aliases[slug] = key
+
+
+def movie_key(movie: str, imdb_id: str | None = None, bucket=None) -> str:
+    """
+    Canonical cache key for a movie. With an IMDb ID the ID is the key and
+    the title's slug is recorded as an alias of it; without one, a known
+    alias for the slug wins over the slug itself.
+    """
+    slug = slugify(movie)
+    if is_imdb_id(imdb_id):
+        with _aliases_lock:
+            known = _aliases.get(slug)
+        if known != imdb_id:
+            try:
+                record_alias(bucket or _bucket(), movie, imdb_id)
+            except Exception as e:
+                logger.warning(f"Could not record alias '{slug}' -> '{imdb_id}': {e}")
+        return imdb_id
+
+    with _aliases_lock:
+        if slug in _aliases:
+            return _aliases[slug]
+    try:
+        alias = _load_alias(bucket or _bucket(), slug)
+    except Exception as e:
+        logger.warning(f"Alias lookup for '{slug}' failed: {e}")
+        return slug
+    key = alias['key'] if alias else slug
+    with _aliases_lock:
+        _aliases[slug] = key
+    return key
+
+
+def titles_by_key(bucket) -> dict[str, tuple[str, int | None]]:
+    """
+    Display title and year for each aliased key, read from the alias index.
+    """
+    titles = {}
+    for blob in bucket.list_blobs(prefix=ALIAS_PREFIX):
+        try:
+            alias = json.loads(blob.download_as_bytes())
+        except ValueError:
+            continue
+        titles.setdefault(alias['key'], (alias['title'], alias.get('year')))
+    return titles
+
+
+def _bucket():
+    from src.storage import get_bucket
+    return get_bucket()
+
+
+def _legacy_directory(name: str) -> str | None:
+    """
+    Find D in an episode object name laid out as "D/D<variant><suffix>".
+    D may itself contain "/" when the title did.
+    """
+    if not name.endswith(_LEGACY_SUFFIXES):
+        return None
+    for i, char in enumerate(name):
+        if char == '/' and name[i + 1:].startswith(name[:i]):
+            return name[:i]
+    return None
+
+
+def _resolve_legacy(directory: str, use_imdb: bool) -> tuple[str, str]:
+    from src.storage import movie_from_directory
+    title, year = movie_from_directory(directory)
+    movie = f"{title} ({year})" if year else title
+    if use_imdb:
+        from src.utils import find_similar_movie_imdb
+        found, details = find_similar_movie_imdb(movie)
+        # only trust the match when the year agrees (or there's no year to check)
+        if found and is_imdb_id(details.get('imdb_id')) and (year is None or details.get('release_date') == year):
+            return f"{details['title']} ({details['release_date']})", details['imdb_id']
+    return movie, slugify(movie)
+
+
+def _migrated_name(name: str, directory: str, key: str) -> str:
+    rest = name[len(directory) + 1:]
+    if rest.startswith(directory):
+        rest = key + rest[len(directory):]
+    return f"{key}/{rest}"
+
+
+def _migrate_directory(bucket, blobs: list, directory: str, key: str, delete: bool):
+    """
+    Move one directory's objects onto `key` so that no reader sees a
+    committed manifest before its objects: data objects are copied first,
+    manifests are rewritten (paths and pinned generations) last, and the
+    originals are removed only after that, old manifests before old data.
+    """
+    manifests = [b for b in blobs if b.name.endswith(MANIFEST_SUFFIX)]
+    data = [b for b in blobs if not b.name.endswith(MANIFEST_SUFFIX)]
+
+    copied = {}
+    for blob in data:
+        copied[blob.name] = bucket.copy_blob(blob, bucket, _migrated_name(blob.name, directory, key))
+
+    for blob in manifests:
+        manifest = json.loads(blob.download_as_bytes())
+        for field in ('podcast', 'review', 'transcripts', 'chapters'):
+            if manifest.get(field):
+                manifest[field] = _migrated_name(manifest[field], directory, key)
+        manifest['objects'] = {
+            copied[name].name: {'generation': getattr(copied[name], 'generation', None)}
+            for name in manifest.get('objects', {}) if name in copied}
+        bucket.blob(_migrated_name(blob.name, directory, key)).upload_from_string(
+            json.dumps(manifest), content_type='application/json')
+
+    if delete:
+        for blob in manifests + data:
+            blob.delete()
+
+
+def migrate_legacy_keys(bucket, use_imdb: bool = True, delete: bool = False,
+                        dry_run: bool = False) -> dict[str, str]:
+    """
+    Copy every episode stored under an old title-derived directory onto its
+    canonical key, rewriting file-name prefixes and manifests, and record the
+    old title as an alias. Returns {old directory: new key}.
+    """
+    blobs = [b for b in bucket.list_blobs() if not b.name.startswith(ALIAS_PREFIX)]
+    # single-word titles ("alien") already look like slugs but may still map to an IMDb ID
+    directories = {d for d in map(_legacy_directory, (b.name for b in blobs)) if d and not is_imdb_id(d)}
+
+    moved = {}
+    for directory in sorted(directories):
+        movie, key = _resolve_legacy(directory, use_imdb)
+        if key == directory:
+            continue
+        moved[directory] = key
+        logger.info(f"{directory} -> {key} ({movie})")
+        if dry_run:
+            continue
+        _migrate_directory(bucket, [b for b in blobs if b.name.startswith(directory + '/')],
+                           directory, key, delete)
+        record_alias(bucket, movie, key)
+    return moved
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--dry-run", action="store_true", help="print the mapping without copying")
+    parser.add_argument("--no-imdb", action="store_true", help="use slugs only, skip IMDb lookups")
+    parser.add_argument("--delete", action="store_true", help="remove the old objects after copying")
+    args = parser.parse_args()
+
+    from src import catalog
+    from src.config import setup_logging
+    setup_logging()
+    bucket = _bucket()
+    moved = migrate_legacy_keys(bucket, use_imdb=not args.no_imdb, delete=args.delete, dry_run=args.dry_run)
+    print(f"{len(moved)} directories {'would be ' if args.dry_run else ''}migrated")
+    if not args.dry_run:
+        catalog.rebuild_from_bucket(bucket)
+
+
+if __name__ == "__main__":
+    main()
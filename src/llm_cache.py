@@ -0,0 +1,123 @@
+"""
+Content-addressed cache for Gemini responses.
+
+Entries are keyed by sha256(model name, prompt, generation config) and
+stored as one JSON file each under LLM_CACHE_DIR. Modes (LLM_CACHE_MODE):
+
+    off     no caching
+    cache   serve fresh hits (younger than LLM_CACHE_TTL_SECONDS), store misses
+    record  always call Gemini and store every response, overwriting old entries
+    replay  serve only from the cache, ignoring TTL; a miss raises ReplayMiss
+            instead of touching the network, so runs are reproducible offline
+"""
+import hashlib
+import json
+import logging
+import os
+import threading
+import time
+
+from src.config import LLM_CACHE_MODE, LLM_CACHE_DIR, LLM_CACHE_TTL_SECONDS
+
+logger = logging.getLogger(__name__)
+
+MODES = ('off', 'cache', 'record', 'replay')
+
+
+class ReplayMiss(LookupError):
+    """
+    Raised in replay mode when a prompt has no recorded response.
+    """
+
+
+class LLMCache:
+
+    def __init__(self, directory: str, ttl_seconds: int, mode: str = 'cache'):
+        if mode not in MODES:
+            raise ValueError(f"LLM cache mode must be one of {MODES}, got '{mode}'")
+        self.directory = directory
+        self.ttl_seconds = ttl_seconds
+        self.mode = mode
+        self.hits = 0
+        self.misses = 0
+        self.writes = 0
+        self._lock = threading.Lock()
+
+    @property
+    def reads_enabled(self) -> bool:
+        return self.mode in ('cache', 'replay')
+
+    @property
+    def writes_enabled(self) -> bool:
+        return self.mode in ('cache', 'record')
+
+    @staticmethod
+    def key(model_name: str, prompt: str, generation_config: dict | None = None) -> str:
+        payload = json.dumps({
+            'model': model_name,
+            'prompt_sha256': hashlib.sha256(prompt.encode('utf-8')).hexdigest(),
+            'generation_config': generation_config or {},
+        }, sort_keys=True)
+        return hashlib.sha256(payload.encode('utf-8')).hexdigest()
+
+    def _path(self, key: str) -> str:
+        return os.path.join(self.directory, key[:2], f"{key}.json")
+
+    def get(self, key: str) -> str | None:
+        """
+        Return the cached text, or None on a miss. In replay mode a miss raises.
+        """
+        if not self.reads_enabled:
+            return None
+        try:
+            with open(self._path(key), encoding='utf-8') as f:
+                entry = json.load(f)
+        except (FileNotFoundError, json.JSONDecodeError):
+            entry = None
+
+        fresh = entry is not None and (
+            self.mode == 'replay' or time.time() - entry['created_at'] < self.ttl_seconds)
+        with self._lock:
+            if fresh:
+                self.hits += 1
+            else:
+                self.misses += 1
+        if fresh:
+            return entry['text']
+        if self.mode == 'replay':
+            raise ReplayMiss(f"No recorded Gemini response for key {key}")
+        return None
+
+    def put(self, key: str, model_name: str, generation_config: dict | None, text: str):
+        if not self.writes_enabled:
+            return
+        path = self._path(key)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        tmp_path = f"{path}.{threading.get_ident()}.tmp"
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump({
+                'model': model_name,
+                'generation_config': generation_config or {},
+                'created_at': time.time(),
+                'text': text,
+            }, f)
+        os.replace(tmp_path, path)
+        with self._lock:
+            self.writes += 1
+
+    @property
+    def hit_rate(self) -> float:
+        lookups = self.hits + self.misses
+        return self.hits / lookups if lookups else 0.0
+
+    def stats(self) -> dict:
+        return {
+            'mode': self.mode,
+            'hits': self.hits,
+            'misses': self.misses,
+            'writes': self.writes,
+            'hit_rate': round(self.hit_rate, 3),
+        }
+
+
+llm_cache = LLMCache(LLM_CACHE_DIR, LLM_CACHE_TTL_SECONDS, LLM_CACHE_MODE)
@@ -0,0 +1,401 @@
+"""
+Multi-user load test for the generation path behind the Streamlit app.
+
+Drives app.generate_podcast from N concurrent simulated users (Streamlit runs
+each session in its own thread, so users here are threads too), with Gemini,
+Text-to-Speech, YouTube search/transcripts and GCS replaced by local stand-ins
+that sleep for a configurable latency. Everything else (memoization, async
+fan-out, thread pools, PCM post-processing, MP3 encode, catalog writes) is the
+real code.
+
+    python -m src.loadtest --users 8 --requests 40 --hot-ratio 0.7
+    python -m src.loadtest --users 32 --requests 200 --llm-latency 1.5 --tts-latency 0.8
+
+Reports latency percentiles (overall, hot and cold), throughput, error rate,
+peak RSS and peak thread count.
+"""
+import argparse
+import asyncio
+import fnmatch
+import io
+import itertools
+import json
+import math
+import os
+import random
+import resource
+import statistics
+import struct
+import sys
+import tempfile
+import threading
+import time
+import types
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timezone
+
+# keep the run self-contained: throwaway catalog, no LLM disk cache
+os.environ.setdefault('CATALOG_DB_PATH', os.path.join(tempfile.mkdtemp(prefix='cinecast_loadtest_'), 'catalog.sqlite3'))
+os.environ['LLM_CACHE_MODE'] = 'off'
+
+SAMPLE_RATE = 24000
+HOT_TITLES = ["The Matrix (1999)", "Inception (2010)", "Jurassic Park (1993)", "The Godfather (1972)"]
+
+
+def _latency(mean: float) -> float:
+    # lognormal with the given mean; gives the long right tail real APIs have
+    sigma = 0.5
+    return random.lognormvariate(math.log(max(mean, 1e-3)) - sigma ** 2 / 2, sigma)
+
+
+# ─── Stand-ins for external services ───
+
+class FakeGemini:
+    """
+    Answers the prompt shapes the pipeline sends: relevance checks,
+    per-review prose summaries or JSON key points, and the Jane/Clara dialogue.
+    """
+
+    def __init__(self, mean_latency: float):
+        self.mean_latency = mean_latency
+
+    @staticmethod
+    def _respond(prompt: str) -> str:
+        if "only 'yes' or 'no'" in prompt:
+            return "yes"
+        if "Return only the JSON list" in prompt:
+            return json.dumps([
+                {"aspect": "acting", "stance": "positive", "point": "The lead performances are committed and warm.",
+                 "evidence": "the dinner scene", "spoiler": False},
+                {"aspect": "visuals", "stance": "positive", "point": "The cinematography is striking throughout.",
+                 "evidence": "", "spoiler": False},
+                {"aspect": "pacing", "stance": "negative", "point": "The second act drags.",
+                 "evidence": "a long detour mid-film", "spoiler": False},
+            ])
+        if "Jane and Clara" in prompt:
+            lines = []
+            for i in range(30):
+                speaker = "Jane" if i % 2 == 0 else "Clara"
+                lines.append(f"{speaker}: Line {i} about the film, pacing, performances and score, you know?")
+            return "\n".join(lines)
+        return "The reviewer praises the performances and visuals but finds the second act slow. " * 20
+
+    @staticmethod
+    def _usage(prompt: str, text: str):
+        return types.SimpleNamespace(prompt_token_count=len(prompt) // 4,
+                                     candidates_token_count=len(text) // 4)
+
+    async def generate_content_async(self, prompt, generation_config=None, stream=False):
+        await asyncio.sleep(_latency(self.mean_latency))
+        text = self._respond(prompt)
+        if not stream:
+            return types.SimpleNamespace(text=text, usage_metadata=self._usage(prompt, text))
+
+        async def _chunks():
+            for i in range(0, len(text), 120):
+                await asyncio.sleep(0.02)
+                yield types.SimpleNamespace(text=text[i:i + 120], usage_metadata=self._usage(prompt, text[:i + 120]))
+        return _chunks()
+
+
+def _tone_wav(seconds: float) -> bytes:
+    """
+    LINEAR16 WAV of a 220 Hz tone, built from a cached one-second block.
+    """
+    if not hasattr(_tone_wav, "block"):
+        samples = [int(8000 * math.sin(2 * math.pi * 220 * n / SAMPLE_RATE)) for n in range(SAMPLE_RATE)]
+        _tone_wav.block = struct.pack(f"<{SAMPLE_RATE}h", *samples)
+    data = _tone_wav.block * max(1, int(seconds))
+    header = struct.pack("<4sI4s4sIHHIIHH4sI", b"RIFF", 36 + len(data), b"WAVE", b"fmt ", 16, 1, 1,
+                         SAMPLE_RATE, SAMPLE_RATE * 2, 2, 16, b"data", len(data))
+    return header + data
+
+
+class FakeTTS:
+
+    def __init__(self, mean_latency: float):
+        self.mean_latency = mean_latency
+
+    async def synthesize_speech(self, request):
+        await asyncio.sleep(_latency(self.mean_latency))
+        text = request["input"].text
+        return types.SimpleNamespace(audio_content=_tone_wav(len(text) / 15))
+
+
+def _fake_search_module(mean_latency: float) -> types.ModuleType:
+    class YoutubeSearch:
+        def __init__(self, query, max_results=20):
+            self.query, self.max_results = query, max_results
+
+        def to_dict(self):
+            time.sleep(_latency(mean_latency))
+            seed = abs(hash(self.query)) % 10_000
+            return [{
+                'id': f"{seed}-{i}",
+                'title': f"{self.query} #{i}",
+                'channel': f"Channel {i % 7}",
+                'url_suffix': f"/watch?v={seed}-{i}",
+                'views': f"{random.randint(1_000, 2_000_000):,} views",
+            } for i in range(self.max_results)]
+
+    module = types.ModuleType("youtube_search")
+    module.YoutubeSearch = YoutubeSearch
+    return module
+
+
+def _fake_fetch_transcript(mean_latency: float):
+    def fetch_transcript(video_id, languages=('en',)):
+        time.sleep(_latency(mean_latency))
+        words = ("this movie has a strong cast and a memorable score but the plot drags " * 150).split()
+        return [{'text': " ".join(words[i:i + 10]), 'start': i * 0.5, 'duration': 5.0}
+                for i in range(0, len(words), 10)]
+    return fetch_transcript
+
+
+class FakeBlob:
+    """
+    In-memory object that, like an unversioned GCS bucket, keeps only the
+    live generation; a blob pinned to an older one is not found.
+    """
+
+    def __init__(self, bucket, name, generation=None):
+        self.bucket, self.name, self._pinned = bucket, name, generation
+
+    @property
+    def _entry(self):
+        entry = self.bucket.objects.get(self.name)
+        if entry is not None and self._pinned is not None and entry[2] != self._pinned:
+            return None
+        return entry
+
+    @property
+    def generation(self):
+        return self._entry[2] if self._entry else None
+
+    def reload(self):
+        from google.api_core.exceptions import NotFound
+        if self._entry is None:
+            raise NotFound(self.name)
+
+    @property
+    def size(self):
+        return len(self._entry[0]) if self._entry else None
+
+    @property
+    def time_created(self):
+        return self._entry[1] if self._entry else None
+
+    updated = time_created
+
+    def exists(self):
+        return self._entry is not None
+
+    def download_as_bytes(self):
+        from google.api_core.exceptions import NotFound
+        time.sleep(_latency(self.bucket.mean_latency))
+        if self._entry is None:
+            raise NotFound(self.name)
+        return self._entry[0]
+
+    def upload_from_string(self, data, content_type=None, if_generation_match=None):
+        from google.api_core.exceptions import PreconditionFailed
+        time.sleep(_latency(self.bucket.mean_latency))
+        if isinstance(data, str):
+            data = data.encode("utf-8")
+        with self.bucket.lock:
+            if if_generation_match is not None and self.generation != if_generation_match:
+                raise PreconditionFailed(self.name)
+            self.bucket.objects[self.name] = (bytes(data), datetime.now(timezone.utc),
+                                              next(self.bucket.generations))
+
+    def open(self, mode="rb", **kwargs):
+        if "w" not in mode:
+            return io.BytesIO(self.download_as_bytes())
+        blob = self
+
+        class _Writer(io.BytesIO):
+            def close(self):
+                if not self.closed:
+                    blob.upload_from_string(self.getvalue())
+                super().close()
+        return _Writer()
+
+
+class FakeBucket:
+
+    def __init__(self, mean_latency: float):
+        self.mean_latency = mean_latency
+        self.objects = {}
+        self.generations = itertools.count(1)
+        self.lock = threading.Lock()
+
+    def blob(self, name, generation=None):
+        return FakeBlob(self, name, generation)
+
+    def get_blob(self, name):
+        return FakeBlob(self, name) if name in self.objects else None
+
+    def list_blobs(self, prefix=None, match_glob=None):
+        with self.lock:
+            names = sorted(self.objects)
+        for name in names:
+            if prefix and not name.startswith(prefix):
+                continue
+            if match_glob and not fnmatch.fnmatch(name, match_glob.replace("**", "*")):
+                continue
+            yield FakeBlob(self, name)
+
+
+def install_stand_ins(args):
+    """
+    Swap every external service for its local stand-in.
+    """
+    import src.audio
+    import src.search
+    import src.storage
+    import src.utils
+
+    gemini = FakeGemini(args.llm_latency)
+    tts = FakeTTS(args.tts_latency)
+    bucket = FakeBucket(args.storage_latency)
+
+    sys.modules["youtube_search"] = _fake_search_module(args.search_latency)
+    src.utils.get_async_llm = lambda model_name=None: gemini
+    src.audio.get_async_tts = lambda: tts
+    src.search.fetch_transcript = _fake_fetch_transcript(args.transcript_latency)
+    src.storage.get_storage_client = lambda: types.SimpleNamespace(bucket=lambda name: bucket)
+    return bucket
+
+
+# ─── Resource sampling ───
+
+def _rss_mb() -> float:
+    try:
+        with open("/proc/self/status") as f:
+            for line in f:
+                if line.startswith("VmRSS:"):
+                    return int(line.split()[1]) / 1024
+    except OSError:
+        pass
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+
+class Sampler(threading.Thread):
+
+    def __init__(self, interval: float = 0.2):
+        super().__init__(daemon=True)
+        self.interval = interval
+        self.peak_rss_mb = 0.0
+        self.peak_threads = 0
+        self._stop_event = threading.Event()
+
+    def run(self):
+        while not self._stop_event.is_set():
+            self.peak_rss_mb = max(self.peak_rss_mb, _rss_mb())
+            self.peak_threads = max(self.peak_threads, threading.active_count())
+            self._stop_event.wait(self.interval)
+
+    def stop(self):
+        self._stop_event.set()
+        self.join()
+
+
+# ─── Driver ───
+
+def _plan(args) -> list[dict]:
+    from src.config import LENGTH_PREFERENCE_ORDER
+
+    plan = []
+    for i in range(args.requests):
+        hot = random.random() < args.hot_ratio
+        plan.append({
+            'movie': random.choice(HOT_TITLES) if hot else f"Cold Title {i} ({random.randint(1950, 2025)})",
+            'hot': hot,
+            'allow_spoilers': random.random() < args.spoiler_ratio,
+            'length_preference': random.choice(args.lengths or LENGTH_PREFERENCE_ORDER),
+        })
+    return plan
+
+
+def _percentiles(values: list[float]) -> str:
+    if not values:
+        return "n/a"
+    ordered = sorted(values)
+
+    def pct(p):
+        return ordered[min(len(ordered) - 1, int(p * len(ordered)))]
+    return (f"p50 {pct(0.50):.2f}s  p90 {pct(0.90):.2f}s  p99 {pct(0.99):.2f}s  "
+            f"max {ordered[-1]:.2f}s  mean {statistics.fmean(ordered):.2f}s")
+
+
+def run(args):
+    import app
+    from src import memo, metrics, uploads
+
+    install_stand_ins(args)
+    plan = _plan(args)
+    results = []
+    results_lock = threading.Lock()
+
+    def _one(request):
+        start = time.perf_counter()
+        error = None
+        try:
+            handle = app.generate_podcast(request['movie'], allow_spoilers=request['allow_spoilers'],
+                                          length_preference=request['length_preference'])
+            if not handle.ok:
+                error = handle.error
+            else:
+                # resolve like the UI does on render
+                memo.resolve_podcast(handle)
+                memo.resolve_review(handle)
+        except Exception as e:
+            error = repr(e)
+        with results_lock:
+            results.append({**request, 'latency': time.perf_counter() - start, 'error': error})
+
+    sampler = Sampler()
+    sampler.start()
+    wall_start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=args.users, thread_name_prefix="user") as pool:
+        list(pool.map(_one, plan))
+    wall = time.perf_counter() - wall_start
+    uploads.wait_for_uploads()
+    sampler.stop()
+
+    ok = [r for r in results if r['error'] is None]
+    errors = [r for r in results if r['error'] is not None]
+    print(f"\n{len(results)} requests from {args.users} concurrent users in {wall:.1f}s "
+          f"({len(results) / wall:.2f} req/s)")
+    print(f"errors: {len(errors)} ({len(errors) / max(len(results), 1):.1%})")
+    for r in errors[:5]:
+        print(f"  {r['movie']}: {r['error']}")
+    print(f"latency all : {_percentiles([r['latency'] for r in ok])}")
+    print(f"latency hot : {_percentiles([r['latency'] for r in ok if r['hot']])}")
+    print(f"latency cold: {_percentiles([r['latency'] for r in ok if not r['hot']])}")
+    print(f"peak RSS {sampler.peak_rss_mb:.0f} MB, peak threads {sampler.peak_threads}, "
+          f"payload cache {memo.payloads.size_bytes / 1e6:.1f} MB")
+    print(f"\nLLM and TTS usage by route:\n{metrics.format_report()}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--users", type=int, default=8, help="concurrent simulated sessions")
+    parser.add_argument("--requests", type=int, default=40, help="total generate_podcast calls")
+    parser.add_argument("--hot-ratio", type=float, default=0.7, help="share of requests for popular titles")
+    parser.add_argument("--spoiler-ratio", type=float, default=0.3)
+    parser.add_argument("--lengths", nargs="*", help="length options to draw from (default: all)")
+    parser.add_argument("--llm-latency", type=float, default=1.0, help="mean seconds per Gemini call")
+    parser.add_argument("--tts-latency", type=float, default=0.5, help="mean seconds per TTS call")
+    parser.add_argument("--search-latency", type=float, default=0.8)
+    parser.add_argument("--transcript-latency", type=float, default=0.6)
+    parser.add_argument("--storage-latency", type=float, default=0.05)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    random.seed(args.seed)
+    run(args)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,239 @@
+import json
+import logging
+import pickle
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import dataclass, replace
+
+from src.config import MEMO_MAX_HANDLES, MEMO_MAX_PAYLOAD_BYTES
+from src.freshness import is_stale
+from src.storage import episode_paths, get_bucket
+from src.uploads import download_committed, load_manifest
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass(frozen=True)
+class EpisodeHandle:
+    """
+    Lightweight reference to a generated episode. Holds only GCS paths and
+    metadata; the MP3, script and transcripts are resolved on demand.
+    """
+    movie: str
+    allow_spoilers: bool
+    length_preference: str
+    podcast_path: str
+    review_path: str
+    transcripts_path: str
+    podcast_size: int = 0
+    error: str | None = None
+    created_at: float = 0.0
+    chapters_path: str | None = None
+    movie_key: str = ""
+
+    @property
+    def ok(self) -> bool:
+        return self.error is None
+
+
+def _approx_size(obj) -> int:
+    if isinstance(obj, (bytes, str)):
+        return len(obj)
+    if isinstance(obj, dict):
+        return sum(_approx_size(v) for v in obj.values())
+    if isinstance(obj, (list, tuple)):
+        return sum(_approx_size(v) for v in obj)
+    return 64
+
+
+class PayloadCache:
+    """
+    LRU of resolved payloads keyed by GCS path, bounded by total size in bytes.
+    Hits hand back the same object, so nothing is copied or re-serialized.
+    """
+
+    def __init__(self, max_bytes: int):
+        self.max_bytes = max_bytes
+        self._entries = OrderedDict()
+        self._bytes = 0
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            if key not in self._entries:
+                return None
+            self._entries.move_to_end(key)
+            return self._entries[key][0]
+
+    def put(self, key, value, size: int | None = None):
+        size = _approx_size(value) if size is None else size
+        if size > self.max_bytes:
+            return
+        with self._lock:
+            if key in self._entries:
+                self._bytes -= self._entries.pop(key)[1]
+            self._entries[key] = (value, size)
+            self._bytes += size
+            while self._bytes > self.max_bytes:
+                evicted, (_, evicted_size) = self._entries.popitem(last=False)
+                self._bytes -= evicted_size
+                logger.info(f"Evicted '{evicted}' from payload cache")
+
+    def discard(self, key):
+        with self._lock:
+            if key in self._entries:
+                self._bytes -= self._entries.pop(key)[1]
+
+    @property
+    def size_bytes(self) -> int:
+        return self._bytes
+
+
+class HandleCache:
+    """
+    Count-bounded LRU of (movie, spoilers, length) -> EpisodeHandle.
+    """
+
+    def __init__(self, max_entries: int):
+        self.max_entries = max_entries
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key) -> EpisodeHandle | None:
+        with self._lock:
+            if key not in self._entries:
+                return None
+            self._entries.move_to_end(key)
+            return self._entries[key]
+
+    def put(self, key, handle: EpisodeHandle):
+        with self._lock:
+            self._entries[key] = handle
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def discard(self, key):
+        with self._lock:
+            self._entries.pop(key, None)
+
+
+handles = HandleCache(MEMO_MAX_HANDLES)
+payloads = PayloadCache(MEMO_MAX_PAYLOAD_BYTES)
+
+
+def memoized_episode(generate, movie: str, allow_spoilers: bool, length_preference: str,
+                     movie_key: str, regenerate: bool = False) -> EpisodeHandle:
+    """
+    Return a handle for the episode, calling generate(movie, allow_spoilers=...,
+    length_preference=..., movie_key=...) -> (video_transcripts, review, podcast_bytes,
+    chapters, reduced) only on a miss. Handles are keyed by the canonical movie key, so
+    title variants share one entry. Generated payloads are primed into the payload
+    cache so the first resolve is free. Reduced episodes (fewer sources than the
+    length calls for, under budget pressure) are not memoized, so a later request
+    can rebuild them in full. regenerate=True skips the lookup and replaces the
+    memoized handle with a fresh one.
+    """
+    key = (movie_key, allow_spoilers, length_preference)
+    handle = None if regenerate else handles.get(key)
+    if handle is not None and not is_stale(movie, handle.created_at):
+        return handle
+
+    video_transcripts, review, podcast_bytes, chapters, reduced = generate(
+        movie, allow_spoilers=allow_spoilers, length_preference=length_preference, movie_key=movie_key)
+    paths = episode_paths(movie_key, allow_spoilers, length_preference)
+
+    if podcast_bytes is None:
+        # failures aren't memoized so the next attempt regenerates
+        return EpisodeHandle(movie, allow_spoilers, length_preference, paths.podcast,
+                             paths.review, paths.transcripts, error=review)
+
+    handle = EpisodeHandle(movie, allow_spoilers, length_preference, paths.podcast,
+                           paths.review, paths.transcripts, podcast_size=len(podcast_bytes),
+                           created_at=time.time(), chapters_path=paths.chapters, movie_key=movie_key)
+    payloads.put(handle.podcast_path, podcast_bytes)
+    payloads.put(handle.review_path, review)
+    payloads.put(handle.transcripts_path, video_transcripts)
+    if chapters is not None:
+        payloads.put(handle.chapters_path, chapters)
+    if not reduced:
+        handles.put(key, handle)
+    return handle
+
+
+def _download(handle: EpisodeHandle, field: str, path: str) -> bytes | None:
+    """
+    The handle's `field` object at the generation its manifest committed, not
+    the live object a publish in progress may already have overwritten.
+    """
+    bucket = get_bucket()
+    paths = episode_paths(handle.movie_key, handle.allow_spoilers, handle.length_preference)
+    manifest = load_manifest(bucket, paths.manifest)
+    if manifest is None:
+        # published before manifests, when lengths shared one source list
+        return bucket.blob(paths.legacy_transcripts if field == 'transcripts' else path).download_as_bytes()
+    _, objects = download_committed(bucket, paths.manifest, [field], shared=(paths.legacy_transcripts,),
+                                    manifest=manifest)
+    return objects[field]
+
+
+def _resolve(handle: EpisodeHandle, field: str, path: str, decode):
+    value = payloads.get(path)
+    if value is None:
+        logger.info(f"Resolving '{path}' from GCS")
+        raw = _download(handle, field, path)
+        if raw is None:
+            return None
+        value = decode(raw)
+        payloads.put(path, value)
+    return value
+
+
+def resolve_podcast(handle: EpisodeHandle) -> bytes:
+    return _resolve(handle, 'podcast', handle.podcast_path, lambda raw: raw)
+
+
+def resolve_review(handle: EpisodeHandle) -> str:
+    return _resolve(handle, 'review', handle.review_path, pickle.loads)
+
+
+def resolve_transcripts(handle: EpisodeHandle) -> list[dict]:
+    return _resolve(handle, 'transcripts', handle.transcripts_path, pickle.loads)
+
+
+def resolve_chapters(handle: EpisodeHandle) -> dict | None:
+    """
+    Chapter index for the episode, or None for episodes published without one.
+    """
+    from google.api_core.exceptions import NotFound
+    if not handle.chapters_path:
+        return None
+    try:
+        return _resolve(handle, 'chapters', handle.chapters_path, json.loads)
+    except NotFound:
+        return None
+
+
+def replace_episode(handle: EpisodeHandle, review: str, podcast_bytes: bytes, chapters: dict) -> EpisodeHandle:
+    """
+    Swap in a revised script and audio for an existing episode (same paths),
+    returning the refreshed handle.
+    """
+    revised = replace(handle, podcast_size=len(podcast_bytes), created_at=time.time())
+    payloads.put(revised.podcast_path, podcast_bytes)
+    payloads.put(revised.review_path, review)
+    payloads.put(revised.chapters_path, chapters)
+    handles.put((revised.movie_key, revised.allow_spoilers, revised.length_preference), revised)
+    return revised
+
+
+def forget(movie_key: str, allow_spoilers: bool, length_preference: str):
+    """
+    Drop the memoized handle and payloads of an episode whose publish failed,
+    so the next request reads what is actually committed in GCS.
+    """
+    handles.discard((movie_key, allow_spoilers, length_preference))
+    paths = episode_paths(movie_key, allow_spoilers, length_preference)
+    for path in (paths.podcast, paths.review, paths.transcripts, paths.chapters):
+        payloads.discard(path)
@@ -0,0 +1,103 @@
+import statistics
+import threading
+from collections import defaultdict, deque
+
+# recent latencies kept per route for percentiles
+WINDOW = 512
+
+
+class RouteStats:
+    """
+    Running call, latency and token totals for one route (an LLM stage or "tts").
+    """
+
+    def __init__(self):
+        self.calls = 0
+        self.errors = 0
+        self.cache_hits = 0
+        self.hedges = 0
+        self.hedge_wins = 0
+        self.timeouts = 0
+        self.prompt_tokens = 0
+        self.output_tokens = 0
+        self.total_latency = 0.0
+        self.latencies = deque(maxlen=WINDOW)
+
+    def snapshot(self) -> dict:
+        recent = sorted(self.latencies)
+        return {
+            'calls': self.calls,
+            'errors': self.errors,
+            'cache_hits': self.cache_hits,
+            'hedges': self.hedges,
+            'hedge_wins': self.hedge_wins,
+            'timeouts': self.timeouts,
+            'avg_latency_s': round(self.total_latency / self.calls, 3) if self.calls else None,
+            'p50_latency_s': round(statistics.median(recent), 3) if recent else None,
+            'p95_latency_s': round(recent[int(0.95 * (len(recent) - 1))], 3) if recent else None,
+            'prompt_tokens': self.prompt_tokens,
+            'output_tokens': self.output_tokens,
+        }
+
+
+_routes = defaultdict(RouteStats)
+_lock = threading.Lock()
+
+
+def record_call(route: str, latency: float, prompt_tokens: int = 0, output_tokens: int = 0):
+    with _lock:
+        stats = _routes[route]
+        stats.calls += 1
+        stats.total_latency += latency
+        stats.latencies.append(latency)
+        stats.prompt_tokens += prompt_tokens
+        stats.output_tokens += output_tokens
+
+
+def record_cache_hit(route: str):
+    with _lock:
+        _routes[route].cache_hits += 1
+
+
+def record_error(route: str):
+    with _lock:
+        _routes[route].errors += 1
+
+
+def record_hedge(route: str, won: bool):
+    with _lock:
+        stats = _routes[route]
+        stats.hedges += 1
+        stats.hedge_wins += int(won)
+
+
+def record_timeout(route: str):
+    with _lock:
+        _routes[route].timeouts += 1
+
+
+def latency_quantile(route: str, q: float, min_samples: int = 1) -> float | None:
+    """
+    q-quantile of the route's recent latencies, or None with too little history.
+    """
+    with _lock:
+        recent = sorted(_routes[route].latencies) if route in _routes else []
+    if len(recent) < max(min_samples, 1):
+        return None
+    return recent[int(q * (len(recent) - 1))]
+
+
+def report() -> dict[str, dict]:
+    with _lock:
+        return {route: stats.snapshot() for route, stats in _routes.items()}
+
+
+def format_report() -> str:
+    lines = []
+    for route, snap in sorted(report().items()):
+        lines.append(
+            f"{route}: {snap['calls']} calls ({snap['cache_hits']} cached, {snap['errors']} errors, "
+            f"{snap['timeouts']} timed out, {snap['hedge_wins']}/{snap['hedges']} hedges won), "
+            f"avg {snap['avg_latency_s']}s, p95 {snap['p95_latency_s']}s, "
+            f"tokens in/out {snap['prompt_tokens']}/{snap['output_tokens']}")
+    return "\n".join(lines)
@@ -0,0 +1,108 @@
+import io
+import wave
+
+import numpy as np
+
+SAMPLE_RATE = 24000
+FRAME_MS = 10
+SILENCE_THRESHOLD_DBFS = -45.0  # frames quieter than this count as silence
+EDGE_PAD_MS = 40                # keep a little air so consonants aren't clipped
+LINE_GAP_MS = 350               # pause inserted between speaker turns
+TARGET_LOUDNESS_DBFS = -20.0    # RMS level each voice is leveled to
+PEAK_CEILING = 0.89             # ~ -1 dBFS, applied after leveling
+
+_INT16_MAX = 32768.0
+
+
+def decode_wav(blob: bytes) -> tuple[np.ndarray, int]:
+    """
+    Decode a LINEAR16 TTS response (WAV container) to mono float32 in [-1, 1].
+    """
+    with wave.open(io.BytesIO(blob), 'rb') as wav:
+        sample_rate = wav.getframerate()
+        frames = wav.readframes(wav.getnframes())
+    samples = np.frombuffer(frames, dtype='<i2').astype(np.float32) / _INT16_MAX
+    return samples, sample_rate
+
+
+def frame_dbfs(samples: np.ndarray, sample_rate: int = SAMPLE_RATE) -> np.ndarray:
+    """
+    Per-frame RMS level in dBFS, computed over a (n_frames, frame_len) view.
+    """
+    frame_len = sample_rate * FRAME_MS // 1000
+    n_frames = len(samples) // frame_len
+    if n_frames == 0:
+        return np.full(1, -np.inf)
+    frames = samples[:n_frames * frame_len].reshape(n_frames, frame_len)
+    rms = np.sqrt(np.mean(frames * frames, axis=1))
+    with np.errstate(divide='ignore'):
+        return 20 * np.log10(rms)
+
+
+def trim_silence(samples: np.ndarray, sample_rate: int = SAMPLE_RATE) -> np.ndarray:
+    """
+    Cut leading and trailing frames below the energy threshold.
+    """
+    active = np.flatnonzero(frame_dbfs(samples, sample_rate) > SILENCE_THRESHOLD_DBFS)
+    if active.size == 0:
+        return samples[:0]
+    frame_len = sample_rate * FRAME_MS // 1000
+    pad = sample_rate * EDGE_PAD_MS // 1000
+    start = max(active[0] * frame_len - pad, 0)
+    end = min((active[-1] + 1) * frame_len + pad, len(samples))
+    return samples[start:end]
+
+
+def level_voices(segments: list[np.ndarray], voices: list[str]) -> list[np.ndarray]:
+    """
+    Scale every segment of a voice by one gain so that voice's overall RMS
+    lands on TARGET_LOUDNESS_DBFS, then pull the whole set under the peak ceiling.
+    """
+    gains = {}
+    for voice in set(voices):
+        voiced = [seg for seg, v in zip(segments, voices) if v == voice and seg.size]
+        if not voiced:
+            continue
+        joined = np.concatenate(voiced)
+        rms = float(np.sqrt(np.mean(joined * joined)))
+        gains[voice] = 10 ** (TARGET_LOUDNESS_DBFS / 20) / rms if rms > 0 else 1.0
+
+    leveled = [seg * gains.get(voice, 1.0) for seg, voice in zip(segments, voices)]
+    peak = max((float(np.max(np.abs(seg))) for seg in leveled if seg.size), default=0.0)
+    if peak > PEAK_CEILING:
+        leveled = [seg * (PEAK_CEILING / peak) for seg in leveled]
+    return leveled
+
+
+def assemble(segments: list[np.ndarray], sample_rate: int = SAMPLE_RATE) -> np.ndarray:
+    """
+    Join segments with a fixed LINE_GAP_MS of silence between them, in one concatenate.
+    """
+    gap = np.zeros(sample_rate * LINE_GAP_MS // 1000, dtype=np.float32)
+    pieces = []
+    for seg in segments:
+        if seg.size:
+            pieces.extend((seg, gap))
+    if not pieces:
+        return np.zeros(0, dtype=np.float32)
+    return np.concatenate(pieces[:-1])
+
+
+def segment_bounds(segments: list[np.ndarray], sample_rate: int = SAMPLE_RATE) -> list[tuple[int, int] | None]:
+    """
+    (start, end) sample range each segment occupies in assemble()'s output,
+    or None for empty segments, which assemble() drops.
+    """
+    gap = sample_rate * LINE_GAP_MS // 1000
+    bounds, position = [], 0
+    for seg in segments:
+        if not seg.size:
+            bounds.append(None)
+            continue
+        bounds.append((position, position + seg.size))
+        position += seg.size + gap
+    return bounds
+
+
+def to_int16_bytes(samples: np.ndarray) -> bytes:
+    return (np.clip(samples, -1.0, 1.0) * (_INT16_MAX - 1)).astype('<i2').tobytes()
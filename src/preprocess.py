@@ -0,0 +1,122 @@
+"""
+Cheap, regex- and array-based cleanup of caption fragments before they are
+sent to the per-review summarization prompt: caption artifacts, filler
+words, stutters, sponsor reads and intro/outro boilerplate are dropped.
+"""
+import html
+import logging
+import math
+import re
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+# sponsor blocks: cues closer than this are merged, then the block runs on
+# past the last cue (the read rarely ends on a keyword) up to a hard cap
+SPONSOR_MERGE_SECONDS = 45.0
+SPONSOR_TAIL_SECONDS = 15.0
+SPONSOR_MAX_SECONDS = 120.0
+INTRO_SECONDS = 45.0
+OUTRO_SECONDS = 60.0
+
+_ARTIFACTS = re.compile(
+    r"\[[^\]]{0,40}\]"                                        # [Music], [Applause], [ __ ]
+    r"|\((?:music|applause|laughter|laughs|inaudible|silence)[^)]{0,20}\)"
+    r"|[♪♫]+|>>|&nbsp;",
+    re.IGNORECASE)
+_SPONSOR_CUES = re.compile(
+    r"\b(?:sponsor(?:ed)?(?: by)?|brought to you by|promo code|use (?:my )?code|discount code"
+    r"|link (?:is )?in the description|first \d+ (?:people|customers)|\d+ ?% off|free trial"
+    r"|squarespace|nordvpn|expressvpn|surfshark|skillshare|brilliant\.org|betterhelp"
+    r"|hellofresh|manscaped|raid shadow legends|athletic greens|ag1|displate)\b",
+    re.IGNORECASE)
+_SPONSOR_END = re.compile(
+    r"\b(?:back to the (?:video|review|movie|film)|with that out of the way|now (?:let's|on to)|anyway)\b",
+    re.IGNORECASE)
+_BOILERPLATE = re.compile(
+    r"\b(?:subscribe|hit (?:that|the) (?:like|bell)|notification|patreon|welcome back to"
+    r"|thanks for watching|thank you for watching|see you (?:next time|in the next)"
+    r"|let me know in the comments|comment below|smash that)\b",
+    re.IGNORECASE)
+_FILLERS = re.compile(r"\b(?:u+m+|u+h+|e+r+m+|a+h+|h+m+|mhm|uh-huh)\b[,.]?\s*", re.IGNORECASE)
+# caption stutters: "the the the" -> "the", "i think i think i think" -> "i think"
+# (up to 4-word phrases, three or more times in a row). A single repeat is
+# often emphasis ("very very", "no, no") or meaning ("not not impressed").
+_REPEATS = re.compile(r"\b((?:[\w']+\s+){0,3}[\w']+)(?:\s+\1\b){2,}", re.IGNORECASE)
+_NEGATIONS = re.compile(r"\b(?:not|no|never|nor|none|nothing|neither|\w+n't)\b", re.IGNORECASE)
+_SPACES = re.compile(r"\s+")
+
+
+def estimate_tokens(text: str) -> int:
+    """
+    Rough Gemini token count (~4 characters per token); no API call.
+    """
+    return math.ceil(len(text) / 4)
+
+
+def _collapse_stutter(match: re.Match) -> str:
+    # repeated negations are never collapsed
+    return match.group(0) if _NEGATIONS.search(match.group(1)) else match.group(1)
+
+
+def _sponsor_mask(texts: list[str], starts: np.ndarray, ends: np.ndarray) -> np.ndarray:
+    """
+    Fragments inside sponsor reads: runs of sponsor cues merged by time,
+    extended past the last cue and cut at an explicit "back to the review" cue.
+    """
+    cues = np.flatnonzero([bool(_SPONSOR_CUES.search(t)) for t in texts])
+    mask = np.zeros(len(texts), dtype=bool)
+    if cues.size == 0:
+        return mask
+
+    # split the cue list wherever consecutive cues are far apart
+    breaks = np.flatnonzero(np.diff(starts[cues]) > SPONSOR_MERGE_SECONDS) + 1
+    for group in np.split(cues, breaks):
+        block_start = starts[group[0]]
+        block_end = min(ends[group[-1]] + SPONSOR_TAIL_SECONDS, block_start + SPONSOR_MAX_SECONDS)
+        after = np.flatnonzero((starts > starts[group[-1]]) & (starts < block_end))
+        for i in after:
+            if _SPONSOR_END.search(texts[i]):
+                block_end = starts[i]
+                break
+        mask |= (starts >= block_start) & (starts < block_end)
+    return mask
+
+
+def clean_transcript(fragments: list[dict]) -> tuple[str, dict]:
+    """
+    Turn fetched caption fragments ({'text', 'start', 'duration'}) into
+    compact review text. Returns (text, stats) where stats has estimated
+    token counts before and after and how many fragments were dropped.
+    """
+    raw_texts = [f.get('text', '') for f in fragments]
+    raw = " ".join(raw_texts)
+    if not fragments:
+        return "", {'raw_tokens': 0, 'clean_tokens': 0, 'sponsor_fragments': 0, 'boilerplate_fragments': 0}
+
+    texts = [_ARTIFACTS.sub(" ", html.unescape(t).replace("\n", " ")) for t in raw_texts]
+    starts = np.array([f.get('start', 0.0) for f in fragments], dtype=np.float64)
+    ends = starts + np.array([f.get('duration', 0.0) for f in fragments], dtype=np.float64)
+
+    sponsor = _sponsor_mask(texts, starts, ends)
+    edges = (starts < starts[0] + INTRO_SECONDS) | (ends > ends.max() - OUTRO_SECONDS)
+    boilerplate = edges & np.array([bool(_BOILERPLATE.search(t)) for t in texts])
+    # rolling auto-captions often repeat the previous fragment verbatim
+    normalized = np.array([_SPACES.sub(" ", t).strip().lower() for t in texts])
+    repeated = np.zeros(len(texts), dtype=bool)
+    repeated[1:] = normalized[1:] == normalized[:-1]
+    keep = ~(sponsor | boilerplate | repeated)
+
+    text = " ".join(t for t, k in zip(texts, keep) if k)
+    text = _FILLERS.sub(" ", text)
+    text = _SPACES.sub(" ", text)
+    text = _REPEATS.sub(_collapse_stutter, text).strip()
+
+    stats = {
+        'raw_tokens': estimate_tokens(raw),
+        'clean_tokens': estimate_tokens(text),
+        'sponsor_fragments': int(sponsor.sum()),
+        'boilerplate_fragments': int((boilerplate & ~sponsor).sum()),
+    }
+    return text, stats
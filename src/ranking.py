@@ -0,0 +1,64 @@
+import logging
+import math
+
+from src import catalog
+
+logger = logging.getLogger(__name__)
+
+# Relative weight of each signal in the final score
+WEIGHTS = {
+    'length': 0.35,
+    'channel': 0.25,
+    'views': 0.25,
+    'spoiler_fit': 0.15,
+}
+IDEAL_WORDS = 1500
+
+
+def _length_score(transcript: str) -> float:
+    # ramps up to IDEAL_WORDS, then flat: longer reviews aren't better, just costlier
+    words = len(transcript.split())
+    return min(words / IDEAL_WORDS, 1.0)
+
+
+def _channel_score(history: tuple[int, int] | None) -> float:
+    # Laplace-smoothed success rate, so unknown channels start at 0.5
+    useful, rejected = history or (0, 0)
+    return (useful + 1) / (useful + rejected + 2)
+
+
+def _views_score(views: int) -> float:
+    # log scale, saturating around 10M views
+    return min(math.log10(views + 1) / 7, 1.0)
+
+
+def _spoiler_fit(source: dict, allow_spoilers: bool) -> float:
+    # spoiler-free mode already filters out likely spoilers; in spoiler mode
+    # prefer the reviews that actually go into the plot
+    if not allow_spoilers:
+        return 1.0
+    return 1.0 if source.get('likely_has_spoilers') else 0.6
+
+
+def score_sources(sources: list[dict], allow_spoilers: bool = False) -> list[tuple[float, dict]]:
+    history = catalog.channel_history(list({s['creator'] for s in sources}))
+    scored = []
+    for source in sources:
+        score = (WEIGHTS['length'] * _length_score(source['transcript'])
+                 + WEIGHTS['channel'] * _channel_score(history.get(source['creator']))
+                 + WEIGHTS['views'] * _views_score(source.get('views', 0))
+                 + WEIGHTS['spoiler_fit'] * _spoiler_fit(source, allow_spoilers))
+        scored.append((score, source))
+    return sorted(scored, key=lambda pair: -pair[0])
+
+
+def select_top_sources(sources: list[dict], k: int, allow_spoilers: bool = False) -> list[dict]:
+    """
+    Keep the K best-scoring transcripts for summarization.
+    """
+    scored = score_sources(sources, allow_spoilers=allow_spoilers)
+    for score, source in scored:
+        logger.info(f"Source score {score:.2f}: '{source['title']}' by '{source['creator']}'")
+    selected = [source for _, source in scored[:k]]
+    logger.info(f"Selected top {len(selected)} of {len(sources)} sources")
+    return selected
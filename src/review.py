@@ -1,6 +1,9 @@
 import logging
 import asyncio
-from src.utils import get_gemini_response
+import json
+from src.utils import get_gemini_response, get_gemini_response_stream
+from src.clients import run_blocking
+from src.llm_cache import ReplayMiss
 import re
 
 logger = logging.getLogger(__name__)
@@ -22,17 +25,119 @@ async def get_review_summary(chunk, movie, allow_spoilers=False):
     I will provide the film review below:
     {chunk['transcript']}
     """
-    summary = await get_gemini_response(prompt)
+    summary = await get_gemini_response(prompt, route="review_summary")
     return summary
 
 
-async def review_summary_with_retry(chunk, movie, max_retries=20, initial_delay=5, allow_spoilers=False):
+POINT_ASPECTS = ["story", "acting", "direction", "visuals", "music", "pacing", "themes", "overall"]
+POINT_STANCES = ["positive", "negative", "mixed"]
+
+
+def _parse_points(text):
+    """
+    Parse and validate the JSON list returned by get_review_points.
+    Raises ValueError on malformed output so the retry loop kicks in.
+    """
+    text = text.strip()
+    if text.startswith("```"):
+        text = text.strip("`").removeprefix("json").strip()
+    raw_points = json.loads(text)
+    if not isinstance(raw_points, list):
+        raise ValueError("expected a JSON list of points")
+
+    points = []
+    for item in raw_points:
+        if not isinstance(item, dict) or not str(item.get("point", "")).strip():
+            continue
+        points.append({
+            "aspect": item.get("aspect") if item.get("aspect") in POINT_ASPECTS else "overall",
+            "stance": item.get("stance") if item.get("stance") in POINT_STANCES else "mixed",
+            "point": str(item["point"]).strip(),
+            "evidence": str(item.get("evidence", "")).strip(),
+            "spoiler": bool(item.get("spoiler", False)),
+        })
+    return points
+
+
+async def get_review_points(chunk, movie, allow_spoilers=False):
+    """
+    Structured alternative to get_review_summary: extract a compact list of
+    typed points instead of ~1000 words of prose.
+    """
+    logger.info(f"extracting points from review '{chunk['title']}' by '{chunk['creator']}'")
+
+    spoiler_instruction = ""
+    if not allow_spoilers:
+        spoiler_instruction = "Do not include points that reveal plot spoilers or key story revelations."
+
+    prompt = f"""
+    You are an intelligent film critic.
+    Extract the key points from someone's review of the film "{movie}".
+    If the provided review is not a dedicated review of "{movie}", return an empty JSON list: [].
+    Otherwise return a JSON list of at most 12 objects, each with:
+      "aspect": one of {json.dumps(POINT_ASPECTS)}
+      "stance": one of {json.dumps(POINT_STANCES)}
+      "point": the reviewer's claim in one short sentence
+      "evidence": a short concrete example or reason the reviewer gives (may be empty)
+      "spoiler": true if the point reveals plot details, otherwise false
+    {spoiler_instruction}
+    Return only the JSON list.
+    I will provide the film review below:
+    {chunk['transcript']}
+    """
+    return await get_gemini_response(prompt, route="review_points", parse=_parse_points)
+
+
+def _tokens(text):
+    return set(re.findall(r"[a-z']+", text.lower()))
+
+
+def merge_points(points_per_review, allow_spoilers=False, similarity=0.5, max_points=40):
+    """
+    Merge points across reviews: points on the same aspect with the same
+    stance whose wording overlaps (token Jaccard >= similarity) are folded
+    together, and the merged points are ordered by how many reviews made
+    them. Returns one formatted line per point for the dialogue prompt.
+    """
+    merged = []
+    for points in points_per_review:
+        if not isinstance(points, list):
+            continue
+        for point in points:
+            if point["spoiler"] and not allow_spoilers:
+                continue
+            tokens = _tokens(point["point"])
+            for existing in merged:
+                if existing["aspect"] != point["aspect"] or existing["stance"] != point["stance"]:
+                    continue
+                union = tokens | existing["tokens"]
+                if union and len(tokens & existing["tokens"]) / len(union) >= similarity:
+                    existing["support"] += 1
+                    if len(point["evidence"]) > len(existing["evidence"]):
+                        existing["evidence"] = point["evidence"]
+                    break
+            else:
+                merged.append({**point, "tokens": tokens, "support": 1})
+
+    merged.sort(key=lambda p: -p["support"])
+    lines = []
+    for p in merged[:max_points]:
+        evidence = f" (e.g. {p['evidence']})" if p["evidence"] else ""
+        lines.append(f"[{p['aspect']}, {p['stance']}, {p['support']} review(s)] {p['point']}{evidence}")
+    logger.info(f"Merged {sum(len(p) for p in points_per_review if isinstance(p, list))} points into {len(lines)}")
+    return lines
+
+
+async def review_summary_with_retry(chunk, movie, max_retries=20, initial_delay=5, allow_spoilers=False,
+                                    summarize=get_review_summary):
 
     retries = 0
     delay = initial_delay
     while retries <= max_retries:
         try:
-            return await get_review_summary(chunk, movie, allow_spoilers=allow_spoilers)
+            return await summarize(chunk, movie, allow_spoilers=allow_spoilers)
+        except ReplayMiss:
+            raise
         except Exception as e:
             logger.info(f"Error processing chunk '{chunk.get('title', 'Unknown')}' (Retry {retries + 1}/{max_retries}): {e}")
             if retries < max_retries:
@@ -45,34 +150,73 @@ async def review_summary_with_retry(chunk, movie, max_retries=20, initial_delay=
                 return ""
             
 
-async def _review_summary_parallel_with_retry(chunks, movie, allow_spoilers=False):
+# summary mode -> (per-review function, checkpoint stage)
+SUMMARY_MODES = {
+    'prose': (get_review_summary, 'summaries'),
+    'points': (get_review_points, 'points'),
+}
+
+
+async def _summarize_and_checkpoint(chunk, movie, allow_spoilers=False, checkpoint=None, mode='prose',
+                                    on_summary=None):
+    summarize, stage = SUMMARY_MODES[mode]
+    summary = await review_summary_with_retry(chunk, movie, allow_spoilers=allow_spoilers, summarize=summarize)
+    # "" means every retry failed; an empty points list is a real answer
+    if summary != "" and on_summary is not None:
+        on_summary(chunk, summary)
+    if summary != "" and checkpoint is not None:
+        try:
+            await run_blocking('storage', checkpoint.save_item, stage, chunk['url'], summary)
+        except Exception as e:
+            logger.warning(f"Could not checkpoint summary for '{chunk.get('title', 'Unknown')}': {e}")
+    return summary
+
+
+async def _review_summary_parallel_with_retry(chunks, movie, allow_spoilers=False, checkpoint=None, mode='prose',
+                                              on_summary=None):
+
+    done = {}
+    if checkpoint is not None:
+        done = await run_blocking('storage', checkpoint.load_items, SUMMARY_MODES[mode][1])
 
     tasks = []
 
     for chunk in chunks:
-        task = asyncio.create_task(review_summary_with_retry(chunk, movie, allow_spoilers=allow_spoilers))
-        tasks.append(task)
+        if chunk['url'] in done:
+            continue
+        task = asyncio.create_task(_summarize_and_checkpoint(chunk, movie, allow_spoilers=allow_spoilers, checkpoint=checkpoint, mode=mode, on_summary=on_summary))
+        tasks.append((chunk['url'], task))
 
-    results = await asyncio.gather(*tasks)
+    for url, task in tasks:
+        done[url] = await task
+
+    results = [done[chunk['url']] for chunk in chunks]
 
     return results
 
-def review_summary_parallel_with_retry(chunks, movie, allow_spoilers=False):
-    results = asyncio.run(_review_summary_parallel_with_retry(chunks=chunks, movie=movie, allow_spoilers=allow_spoilers))
+def review_summary_parallel_with_retry(chunks, movie, allow_spoilers=False, checkpoint=None, mode='prose',
+                                       on_summary=None):
+    """
+    Summarize every chunk in parallel. mode='prose' returns one summary string
+    per chunk; mode='points' returns one list of typed points per chunk
+    (merge them with merge_points before building the dialogue prompt).
+    on_summary(chunk, summary) is called for each chunk summarized in this
+    call, not for ones resumed from the checkpoint or that failed every retry.
+    """
+    results = asyncio.run(_review_summary_parallel_with_retry(chunks=chunks, movie=movie, allow_spoilers=allow_spoilers, checkpoint=checkpoint, mode=mode, on_summary=on_summary))
     return results
 
 
-def get_final_summary(chunks, movie, allow_spoilers=False, length_prompt_instruction: str = "between 1500 and 2000 words"):
+def _build_dialogue_prompt(chunks, movie, allow_spoilers=False, length_prompt_instruction: str = "between 1500 and 2000 words"):
     """
-    Instead of returning a single-voice essay, this will ask Gemini to produce
-    a two-person dialogue between Jane and Clara, alternating turns and covering
-    the key points extracted from the individual review summaries.
+    Build the Jane/Clara dialogue prompt from the individual review summaries.
+    Returns None when there is nothing usable to build it from.
     """
     # 1) Filter and collect the raw summaries
     valid_chunks = [c for c in chunks if isinstance(c, str) and c.strip()]
     if not valid_chunks:
         logger.warning(f"No valid review summaries provided for final synthesis of '{movie}'.")
-        return f"Could not generate a final summary for {movie} as no valid source review summaries were available."
+        return None
 
     # 2) Turn each summary into a bullet point for clarity
     points = "\n".join(f"- {summary.strip()}" for summary in valid_chunks)
@@ -130,10 +274,59 @@ def get_final_summary(chunks, movie, allow_spoilers=False, length_prompt_instruc
     • Present ALL insights as Jane and Clara's PERSONAL thoughts and observations about the film.
     """
 
-    # 5) Call Gemini and return the script
-    review_dialogue = asyncio.run(get_gemini_response(dialogue_prompt))
-    review_dialogue = review_dialogue.strip().replace('*','').split('\n')
-    review_dialogue = [line for line in review_dialogue if "Jane:" in line or "Clara:" in line]
+    return dialogue_prompt
+
+
+def _clean_dialogue_line(line):
+    """
+    Strip markdown emphasis and drop anything that is not a speaker turn.
+    """
+    line = line.strip().replace('*', '')
+    if "Jane:" in line or "Clara:" in line:
+        return line
+    return None
+
+
+def get_final_summary(chunks, movie, allow_spoilers=False, length_prompt_instruction: str = "between 1500 and 2000 words"):
+    """
+    Instead of returning a single-voice essay, this will ask Gemini to produce
+    a two-person dialogue between Jane and Clara, alternating turns and covering
+    the key points extracted from the individual review summaries.
+    """
+    dialogue_prompt = _build_dialogue_prompt(chunks, movie, allow_spoilers=allow_spoilers,
+                                             length_prompt_instruction=length_prompt_instruction)
+    if dialogue_prompt is None:
+        return f"Could not generate a final summary for {movie} as no valid source review summaries were available."
+
+    # Call Gemini and return the script
+    review_dialogue = asyncio.run(get_gemini_response(dialogue_prompt, route="final_dialogue"))
+    review_dialogue = review_dialogue.strip().split('\n')
+    review_dialogue = [line for line in map(_clean_dialogue_line, review_dialogue) if line]
     review_dialogue = '\n\n\n'.join(review_dialogue)
 
-    return review_dialogue
\ No newline at end of file
+    return review_dialogue
+
+
+async def stream_final_summary(chunks, movie, allow_spoilers=False, length_prompt_instruction: str = "between 1500 and 2000 words"):
+    """
+    Streaming variant of get_final_summary: yields each complete "Jane:"/"Clara:"
+    line as soon as Gemini has finished writing it, so TTS can start on the
+    opening lines while the rest of the script is still being generated.
+    """
+    dialogue_prompt = _build_dialogue_prompt(chunks, movie, allow_spoilers=allow_spoilers,
+                                             length_prompt_instruction=length_prompt_instruction)
+    if dialogue_prompt is None:
+        return
+
+    buffer = ""
+    async for text in get_gemini_response_stream(dialogue_prompt, route="final_dialogue"):
+        buffer += text
+        *complete, buffer = buffer.split('\n')
+        for raw_line in complete:
+            line = _clean_dialogue_line(raw_line)
+            if line:
+                yield line
+
+    line = _clean_dialogue_line(buffer)
+    if line:
+        yield line
\ No newline at end of file
@@ -1,14 +1,64 @@
 import logging
-from youtube_transcript_api import YouTubeTranscriptApi
-from src.config import proxy
+import threading
+from datetime import date
 from src.utils import get_gemini_response, is_spoiler_review
+from src.clients import run_blocking
+from src.config import TRANSCRIPT_PREPROCESS
+from src.llm_cache import ReplayMiss
+from src.transcripts import fetch_transcript
 import asyncio
 
 logger = logging.getLogger(__name__)
 
-# remove proxy=proxy for local
+MIN_REVIEWS = 2
+# transcripts shorter than this don't count towards the early-cancel quorum
+MIN_TRANSCRIPT_WORDS = 300
+
+# (query, max_results, day) -> search results; entries from earlier days are dropped
+_search_cache = {}
+_search_cache_lock = threading.Lock()
+
+
+async def search_videos(query, max_results=20):
+    """
+    YouTube search, run off the event loop and cached per (query, day)
+    so repeated requests for the same title within a day skip the round trip.
+    """
+    today = date.today().isoformat()
+    key = (query, max_results, today)
+    with _search_cache_lock:
+        if key in _search_cache:
+            logger.info(f"Search cache hit for '{query}'")
+            return _search_cache[key]
+
+    from youtube_search import YoutubeSearch
+    videos = await run_blocking('search', lambda: YoutubeSearch(query, max_results=max_results).to_dict())
+
+    with _search_cache_lock:
+        for stale in [k for k in _search_cache if k[2] != today]:
+            del _search_cache[stale]
+        _search_cache[key] = videos
+    return videos
+
+def video_id(source: dict) -> str:
+    """
+    Video ID of a stored transcript dict; older entries only carry the URL.
+    """
+    if source.get('id'):
+        return source['id']
+    return source['url'].split('v=', 1)[-1].split('&', 1)[0]
+
+
+def parse_view_count(views) -> int:
+    """
+    youtube_search reports views as display text, e.g. "1,234,567 views".
+    """
+    if not views:
+        return 0
+    digits = ''.join(ch for ch in str(views) if ch.isdigit())
+    return int(digits) if digits else 0
+
 async def get_single_trasncript(video, movie, allow_spoilers=False):
-    proxies = {'http': proxy, 'https': proxy} if proxy else None
     video_id = video['id']
     video_title = video['title'].replace('|',',')
     video_creator = video['channel'].replace('|',',')
@@ -24,9 +74,9 @@ async def get_single_trasncript(video, movie, allow_spoilers=False):
     The title is provided below:
     {video_title}
     """
-    response = await get_gemini_response(review_or_not)
+    response = await get_gemini_response(review_or_not, route="relevance")
 
-    if response.lower() == 'yes':
+    if response.lower().strip('. ') == 'yes':
         contains_spoiler = is_spoiler_review(video_title)
         logger.info(f"Video '{video_title}' contains_spoiler={contains_spoiler}, allow_spoilers={allow_spoilers}")
         if contains_spoiler and not allow_spoilers:
@@ -37,18 +87,28 @@ async def get_single_trasncript(video, movie, allow_spoilers=False):
 
 
         try:
-            transcript_list = await asyncio.to_thread(YouTubeTranscriptApi.get_transcript, video_id, languages=['en'], proxies=proxies)
-            # transcript_list = await asyncio.to_thread(YouTubeTranscriptApi.get_transcript, video_id, languages=['en'])
-
-            full_transcript = " ".join([item['text'] for item in transcript_list])
-
-            logger.info(f"Transcript for '{video_title}' by '{video_creator}' Retrieved")
+            transcript_list = await run_blocking('transcripts', fetch_transcript, video_id, languages=['en'])
+
+            if TRANSCRIPT_PREPROCESS:
+                from src.preprocess import clean_transcript
+                full_transcript, token_stats = clean_transcript(transcript_list)
+                logger.info(f"Transcript for '{video_title}' by '{video_creator}' Retrieved, "
+                            f"~{token_stats['raw_tokens']} -> ~{token_stats['clean_tokens']} tokens "
+                            f"({token_stats['sponsor_fragments']} sponsor, "
+                            f"{token_stats['boilerplate_fragments']} boilerplate fragments dropped)")
+            else:
+                full_transcript = " ".join([item['text'] for item in transcript_list])
+                token_stats = None
+                logger.info(f"Transcript for '{video_title}' by '{video_creator}' Retrieved")
 
             return  {
+                'id': video_id,
                 'title': video_title,
                 'creator': video_creator,
+                'views': parse_view_count(video.get('views')),
                 'url': video_url,
                 'transcript': full_transcript,
+                'transcript_tokens': token_stats,
                 'likely_has_spoilers': contains_spoiler if 'contains_spoiler' in locals() else False
             }
         except Exception as e:
@@ -57,21 +117,101 @@ async def get_single_trasncript(video, movie, allow_spoilers=False):
             return None
 
 
-async def _get_video_transcripts(videos, movie, allow_spoilers=False):
-    
-    logger.info(f"Starting transcript retrieval with allow_spoilers={allow_spoilers}")
+def _is_good_transcript(result) -> bool:
+    return result is not None and len(result['transcript'].split()) >= MIN_TRANSCRIPT_WORDS
 
-    tasks = []
 
-    for video in videos:
-        segment = asyncio.create_task(get_single_trasncript(video, movie, allow_spoilers=allow_spoilers))
-        tasks.append(segment)
+async def _collect(tasks, results, quorum=None):
+    """
+    Await tasks as they finish, appending non-None results. Returns True as
+    soon as `quorum` good transcripts have been collected (tasks still
+    pending at that point are left for the caller to cancel).
+    """
+    pending = set(tasks)
+    while pending:
+        finished, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+        for task in finished:
+            if task.cancelled():
+                continue
+            if isinstance(task.exception(), ReplayMiss):
+                # a replay must fail loudly rather than diverge with fewer sources
+                raise task.exception()
+            if task.exception() is not None:
+                logger.error(f"Transcript task failed: {task.exception()}")
+                continue
+            if task.result() is not None:
+                results.append(task.result())
+        if quorum and sum(map(_is_good_transcript, results)) >= quorum:
+            return True
+    return False
+
+
+async def _find_review_transcripts(movie, allow_spoilers=False, max_results=20, quorum=None, known_ids=None):
+    """
+    Run the targeted (spoiler / no spoiler) search and the general
+    "movie review" fallback search concurrently. Transcript fetches start
+    as soon as either search returns, deduplicated by video ID. If the
+    primary results alone yield enough reviews the speculative fallback
+    work is cancelled; otherwise both result sets are merged.
+
+    Once `quorum` good transcripts are in, every outstanding classification
+    and fetch is cancelled; ranking then picks the best of what arrived.
 
-    video_transcripts = await asyncio.gather(*tasks)
+    Videos in `known_ids` (already fetched by an earlier build) are skipped.
+    """
+    if allow_spoilers:
+        primary_query = movie + ' movie spoiler review'
+    else:
+        primary_query = movie + ' movie no spoiler review'
+    fallback_query = movie + ' movie review'
 
-    return video_transcripts
+    tasks_by_id = {}
+    known_ids = known_ids or set()
 
-def get_video_transcripts(videos, movie, allow_spoilers=False):
-    result = asyncio.run(_get_video_transcripts(videos, movie, allow_spoilers=allow_spoilers))
-    result = [x for x in result if x is not None]
-    return result
\ No newline at end of file
+    async def _search_and_launch(query):
+        try:
+            videos = await search_videos(query, max_results=max_results)
+        except Exception as e:
+            logger.error(f"YouTube search for '{query}' failed: {e}")
+            return []
+        videos = [video for video in videos if video['id'] not in known_ids]
+        for video in videos:
+            if video['id'] not in tasks_by_id:
+                tasks_by_id[video['id']] = asyncio.create_task(
+                    get_single_trasncript(video, movie, allow_spoilers=allow_spoilers))
+        return [video['id'] for video in videos]
+
+    async def _cancel_outstanding():
+        fallback.cancel()
+        for task in tasks_by_id.values():
+            task.cancel()
+        await asyncio.gather(fallback, *tasks_by_id.values(), return_exceptions=True)
+
+    logger.info(f"Searching YouTube for {'spoiler' if allow_spoilers else 'non-spoiler'} reviews on {movie}...")
+    primary = asyncio.create_task(_search_and_launch(primary_query))
+    fallback = asyncio.create_task(_search_and_launch(fallback_query))
+
+    results = []
+    primary_ids = list(dict.fromkeys(await primary))
+    reached = await _collect([tasks_by_id[i] for i in primary_ids], results, quorum)
+
+    if reached or len(results) >= MIN_REVIEWS:
+        if reached:
+            logger.info(f"Source quorum of {quorum} reached, cancelling outstanding fetches")
+        await _cancel_outstanding()
+        return results
+
+    logger.info("Not enough reviews found. Merging general search results...")
+    fallback_ids = await fallback
+    seen = set(primary_ids)
+    extra_ids = [i for i in dict.fromkeys(fallback_ids) if i not in seen]
+    if await _collect([tasks_by_id[i] for i in extra_ids], results, quorum):
+        logger.info(f"Source quorum of {quorum} reached, cancelling outstanding fetches")
+        await _cancel_outstanding()
+    return results
+
+
+def find_review_transcripts(movie, allow_spoilers=False, max_results=20, quorum=None, known_ids=None):
+    return asyncio.run(_find_review_transcripts(movie, allow_spoilers=allow_spoilers,
+                                                max_results=max_results, quorum=quorum,
+                                                known_ids=known_ids))
@@ -0,0 +1,68 @@
+"""
+Startup profile mode: report how long each module takes to import.
+
+    python -m src.startup_profile            # profile `import app`
+    python -m src.startup_profile pages._podcasts --top 40
+
+Runs the import in a fresh interpreter with `-X importtime` so the numbers
+match a Cloud Run cold start rather than a warm process.
+"""
+import argparse
+import subprocess
+import sys
+from collections import defaultdict
+
+
+def profile_imports(target: str = "app") -> list[tuple[str, int, int]]:
+    """
+    Return (module, self_us, cumulative_us) for every module imported by `target`.
+    """
+    proc = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {target}"],
+        capture_output=True, text=True,
+    )
+    rows = []
+    for line in proc.stderr.splitlines():
+        if not line.startswith("import time:") or "self [us]" in line:
+            continue
+        self_us, cumulative_us, name = line[len("import time:"):].split("|")
+        rows.append((name.strip(), int(self_us), int(cumulative_us)))
+    if proc.returncode != 0:
+        print(proc.stderr.splitlines()[-1] if proc.stderr else f"import {target} failed", file=sys.stderr)
+    return rows
+
+
+def by_package(rows: list[tuple[str, int, int]]) -> dict[str, int]:
+    """
+    Sum self time per top-level package (google, pandas, streamlit, ...).
+    """
+    totals = defaultdict(int)
+    for name, self_us, _ in rows:
+        totals[name.split(".")[0]] += self_us
+    return dict(totals)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("target", nargs="?", default="app")
+    parser.add_argument("--top", type=int, default=25)
+    args = parser.parse_args()
+
+    rows = profile_imports(args.target)
+    if not rows:
+        return
+
+    total_ms = sum(r[1] for r in rows) / 1000
+    print(f"import {args.target}: {total_ms:.1f} ms across {len(rows)} modules\n")
+
+    print(f"{'package':<40}{'self ms':>10}")
+    for package, us in sorted(by_package(rows).items(), key=lambda kv: -kv[1])[:args.top]:
+        print(f"{package:<40}{us / 1000:>10.1f}")
+
+    print(f"\n{'module':<60}{'cumulative ms':>15}")
+    for name, _, cumulative_us in sorted(rows, key=lambda r: -r[2])[:args.top]:
+        print(f"{name:<60}{cumulative_us / 1000:>15.1f}")
+
+
+if __name__ == "__main__":
+    main()
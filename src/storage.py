@@ -0,0 +1,109 @@
+import re
+from dataclasses import dataclass
+
+from src.clients import get_storage_client
+from src.config import GCS_BUCKET_NAME, PODCAST_LENGTH_OPTIONS, DEFAULT_LENGTH_PREFERENCE
+
+PODCAST_BLOB_SUFFIX = "_podcast.mp3"
+MANIFEST_BLOB_SUFFIX = "_manifest.json"
+SPOILER_SUFFIXES = {"_spoiler": True, "_no_spoiler": False}
+
+
+@dataclass(frozen=True)
+class EpisodePaths:
+    """
+    GCS object names for one (movie, spoiler, length) episode.
+    """
+    directory: str
+    podcast: str
+    review: str
+    transcripts: str
+    legacy_transcripts: str  # pre-manifest/shared-by-all-lengths name, read-only fallback
+    chapters: str         # JSON line index: start/end times and MP3 byte ranges
+    manifest: str         # written last; its presence marks a complete episode
+    variant: str          # spoiler + length, e.g. "_no_spoiler_clip"
+    sources_variant: str  # spoiler only; sources are shared across lengths
+
+
+def movie_directory(movie: str) -> str:
+    """
+    Pre-identity cache directory for a title; only used to find episodes
+    that still need migrating (see src/identity.py).
+    """
+    return movie.lower().replace(' ', '_')
+
+
+def length_suffix(length_preference: str) -> str:
+    length_options = PODCAST_LENGTH_OPTIONS.get(
+        length_preference, PODCAST_LENGTH_OPTIONS[DEFAULT_LENGTH_PREFERENCE])
+    return length_options["filename_suffix"]
+
+
+def episode_paths(movie_key: str, allow_spoilers: bool, length_preference: str) -> EpisodePaths:
+    """
+    Object names for an episode, keyed by the canonical movie key
+    (src.identity.movie_key), not the display title.
+    """
+    directory_name = movie_key
+    spoiler_suffix = "_spoiler" if allow_spoilers else "_no_spoiler"
+    suffix = length_suffix(length_preference)
+    return EpisodePaths(
+        directory=directory_name,
+        podcast=f"{directory_name}/{directory_name}{spoiler_suffix}{suffix}_podcast.mp3",
+        review=f"{directory_name}/{directory_name}{spoiler_suffix}{suffix}_review_text.pkl",
+        transcripts=f"{directory_name}/{directory_name}{spoiler_suffix}{suffix}_source_videos.pkl",
+        legacy_transcripts=f"{directory_name}/{directory_name}{spoiler_suffix}_source_videos.pkl",
+        chapters=f"{directory_name}/{directory_name}{spoiler_suffix}{suffix}_chapters.json",
+        manifest=f"{directory_name}/{directory_name}{spoiler_suffix}{suffix}{MANIFEST_BLOB_SUFFIX}",
+        variant=f"{spoiler_suffix}{suffix}",
+        sources_variant=spoiler_suffix,
+    )
+
+
+def parse_podcast_path(path: str) -> dict | None:
+    """
+    Invert episode_paths for a podcast object name. Returns the directory,
+    spoiler flag and length key, or None if the name doesn't match the layout.
+    """
+    if not path.endswith(PODCAST_BLOB_SUFFIX) or path.count('/') != 1:
+        return None
+    directory_name, filename = path.split('/')
+    stem = filename[:-len(PODCAST_BLOB_SUFFIX)]
+    if not stem.startswith(directory_name):
+        return None
+    rest = stem[len(directory_name):]
+
+    # try longest suffixes first so "" (Feature) doesn't shadow "_clip" etc.
+    for spoiler_suffix, allow_spoilers in SPOILER_SUFFIXES.items():
+        for key, options in sorted(PODCAST_LENGTH_OPTIONS.items(),
+                                   key=lambda kv: -len(kv[1]["filename_suffix"])):
+            if rest == spoiler_suffix + options["filename_suffix"]:
+                return {
+                    'directory': directory_name,
+                    'allow_spoilers': allow_spoilers,
+                    'length_preference': key,
+                }
+    return None
+
+
+def split_title_year(movie: str) -> tuple[str, int | None]:
+    """
+    Split "The Matrix (1999)" into ("The Matrix", 1999).
+    """
+    match = re.search(r' \((\d{4})\)$', movie)
+    if not match:
+        return movie, None
+    return movie[:match.start()], int(match.group(1))
+
+
+def movie_from_directory(directory_name: str) -> tuple[str, int | None]:
+    """
+    Best-effort display title and release year from a cache directory
+    such as "the_matrix_(1999)".
+    """
+    title, year = split_title_year(directory_name.replace('_', ' '))
+    return title.title(), year
+
+
+def get_bucket():
+    return get_storage_client().bucket(GCS_BUCKET_NAME)
@@ -0,0 +1,88 @@
+import logging
+import random
+import threading
+import time
+
+from src.config import (proxy, TRANSCRIPT_POOL_SIZE, TRANSCRIPT_HOST_CONCURRENCY,
+                        TRANSCRIPT_MAX_RETRIES, TRANSCRIPT_TIMEOUT_SECONDS)
+
+logger = logging.getLogger(__name__)
+
+_session = None
+_session_lock = threading.Lock()
+# Every transcript request goes to youtube.com, so one semaphore is the per-host limit
+_host_slots = threading.BoundedSemaphore(TRANSCRIPT_HOST_CONCURRENCY)
+
+
+def _get_session():
+    """
+    Shared keep-alive requests.Session routed through the proxy, so repeated
+    fetches reuse pooled connections (and proxy CONNECT tunnels) instead of
+    opening new ones per video.
+    """
+    global _session
+    with _session_lock:
+        if _session is None:
+            import requests
+            from requests.adapters import HTTPAdapter
+
+            class _TimeoutSession(requests.Session):
+                def request(self, *args, **kwargs):
+                    kwargs.setdefault('timeout', TRANSCRIPT_TIMEOUT_SECONDS)
+                    return super().request(*args, **kwargs)
+
+            session = _TimeoutSession()
+            adapter = HTTPAdapter(pool_connections=4, pool_maxsize=TRANSCRIPT_POOL_SIZE)
+            session.mount('https://', adapter)
+            session.mount('http://', adapter)
+            if proxy:
+                session.proxies = {'http': proxy, 'https': proxy}
+            _session = session
+    return _session
+
+
+def _pick_transcript(transcript_list, languages):
+    """
+    Prefer a manual transcript, then an auto-generated one, then any
+    transcript YouTube can machine-translate into the first language.
+    """
+    from youtube_transcript_api import NoTranscriptFound
+
+    try:
+        return transcript_list.find_manually_created_transcript(languages)
+    except NoTranscriptFound:
+        pass
+    try:
+        return transcript_list.find_generated_transcript(languages)
+    except NoTranscriptFound:
+        pass
+    for transcript in transcript_list:
+        if transcript.is_translatable and any(
+                lang['language_code'] == languages[0] for lang in transcript.translation_languages):
+            logger.info(f"Using {transcript.language_code} transcript translated to {languages[0]}")
+            return transcript.translate(languages[0])
+    raise NoTranscriptFound(transcript_list.video_id, languages, transcript_list)
+
+
+def fetch_transcript(video_id: str, languages=('en',)) -> list[dict]:
+    """
+    Blocking fetch of timed caption items for one video, over the shared
+    session, with retry and exponential backoff on transient failures.
+    """
+    from youtube_transcript_api import NoTranscriptFound, TranscriptsDisabled, VideoUnavailable
+    from youtube_transcript_api._transcripts import TranscriptListFetcher
+
+    languages = list(languages)
+    for attempt in range(TRANSCRIPT_MAX_RETRIES):
+        try:
+            with _host_slots:
+                transcript_list = TranscriptListFetcher(_get_session()).fetch(video_id)
+                return _pick_transcript(transcript_list, languages).fetch()
+        except (NoTranscriptFound, TranscriptsDisabled, VideoUnavailable):
+            raise
+        except Exception as e:
+            if attempt == TRANSCRIPT_MAX_RETRIES - 1:
+                raise
+            delay = 2 ** attempt + random.random()
+            logger.warning(f"Transcript fetch for {video_id} failed ({e}), retrying in {delay:.1f}s")
+            time.sleep(delay)
@@ -0,0 +1,196 @@
+import json
+import logging
+import pickle
+import random
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, wait
+
+from src.config import UPLOAD_POOL_SIZE, UPLOAD_MAX_RETRIES, UPLOAD_CHUNK_BYTES
+
+logger = logging.getLogger(__name__)
+
+# One pool for whole-episode publish jobs, one for the individual object
+# uploads they fan out to, so a publish job never waits on its own pool.
+_publish_pool = ThreadPoolExecutor(max_workers=UPLOAD_POOL_SIZE, thread_name_prefix='publish')
+_object_pool = ThreadPoolExecutor(max_workers=UPLOAD_POOL_SIZE * 3, thread_name_prefix='upload')
+_in_flight = set()
+_in_flight_lock = threading.Lock()
+
+
+def _with_retry(fn, description: str):
+    for attempt in range(UPLOAD_MAX_RETRIES):
+        try:
+            return fn()
+        except Exception as e:
+            if attempt == UPLOAD_MAX_RETRIES - 1:
+                raise
+            delay = 2 ** attempt + random.random()
+            logger.warning(f"Upload of {description} failed ({e}), retrying in {delay:.1f}s")
+            time.sleep(delay)
+
+
+def _stream_upload(blob, data: bytes, content_type: str):
+    """
+    Resumable upload in fixed-size chunks, so a dropped connection only
+    re-sends the current chunk instead of the whole file.
+    """
+    with blob.open('wb', content_type=content_type, chunk_size=UPLOAD_CHUNK_BYTES) as f:
+        view = memoryview(data)
+        for start in range(0, len(data), UPLOAD_CHUNK_BYTES):
+            f.write(view[start:start + UPLOAD_CHUNK_BYTES])
+    blob.reload()  # the writer doesn't report the new generation for the manifest
+    return blob
+
+
+def _upload(blob, data: bytes, content_type: str):
+    blob.upload_from_string(data, content_type=content_type)
+    return blob
+
+
+def load_manifest(bucket, manifest_path: str) -> dict | None:
+    from google.api_core.exceptions import NotFound
+    try:
+        return json.loads(bucket.blob(manifest_path).download_as_bytes())
+    except NotFound:
+        return None
+
+
+def touch_manifest(bucket, manifest_path: str):
+    """
+    Restart a committed episode's freshness TTL without republishing it: the
+    manifest gets a new checked_at and keeps its objects and generations.
+    Skipped if another publish replaces the manifest in the meantime.
+    """
+    from google.api_core.exceptions import NotFound, PreconditionFailed
+    blob = bucket.blob(manifest_path)
+    try:
+        manifest = json.loads(blob.download_as_bytes())
+        manifest['checked_at'] = time.time()
+        blob.upload_from_string(json.dumps(manifest).encode('utf-8'), content_type='application/json',
+                                if_generation_match=blob.generation)
+    except (NotFound, PreconditionFailed):
+        logger.info(f"'{manifest_path}' changed while refreshing, leaving it as is")
+
+
+def download_committed(bucket, manifest_path: str, fields: list[str], shared: tuple[str, ...] = (),
+                       manifest: dict | None = None) -> tuple[dict, dict[str, bytes | None]]:
+    """
+    Download the objects a manifest names under `fields` ('podcast',
+    'review', 'transcripts', 'chapters') at the generations it committed, so
+    a publish in progress (objects overwritten, manifest not yet) can't mix
+    new objects with old ones. A committed generation that has already been
+    overwritten (buckets without object versioning keep only the live one)
+    means a publish is under way: the manifest is re-read and the whole set
+    retried. Names in `shared` are written by several episodes (older
+    manifests point at the transcripts shared across lengths) and are read
+    live. A field the manifest leaves empty comes back as None. `manifest`
+    saves the first read when the caller already has it.
+    Returns (manifest, {field: bytes}).
+    """
+    from google.api_core.exceptions import NotFound
+    for attempt in range(UPLOAD_MAX_RETRIES):
+        if manifest is None or attempt:
+            manifest = load_manifest(bucket, manifest_path)
+        if manifest is None:
+            raise NotFound(manifest_path)
+        objects = manifest.get('objects', {})
+
+        def _download(name):
+            if not name:
+                return None
+            generation = None if name in shared else objects.get(name, {}).get('generation')
+            return bucket.blob(name, generation=generation).download_as_bytes()
+
+        try:
+            return manifest, {field: _download(manifest.get(field)) for field in fields}
+        except NotFound:
+            if attempt == UPLOAD_MAX_RETRIES - 1:
+                raise
+            delay = 2 ** attempt + random.random()
+            logger.info(f"'{manifest_path}' is being republished, re-reading in {delay:.1f}s")
+            time.sleep(delay)
+
+
+def _publish(bucket, paths, podcast_bytes: bytes, review, video_transcripts, chapters=None,
+             on_committed=None, sources_limit=None):
+    start = time.time()
+    jobs = {
+        paths.podcast: _object_pool.submit(
+            _with_retry, lambda: _stream_upload(bucket.blob(paths.podcast), podcast_bytes, 'audio/mpeg'),
+            paths.podcast),
+        paths.review: _object_pool.submit(
+            _with_retry, lambda: _upload(bucket.blob(paths.review), pickle.dumps(review),
+                                         'application/octet-stream'),
+            paths.review),
+        paths.transcripts: _object_pool.submit(
+            _with_retry, lambda: _upload(bucket.blob(paths.transcripts), pickle.dumps(video_transcripts),
+                                         'application/octet-stream'),
+            paths.transcripts),
+    }
+    if chapters is not None:
+        jobs[paths.chapters] = _object_pool.submit(
+            _with_retry, lambda: _upload(bucket.blob(paths.chapters), json.dumps(chapters).encode('utf-8'),
+                                         'application/json'),
+            paths.chapters)
+    wait(jobs.values())
+
+    objects = {}
+    for name, job in jobs.items():
+        blob = job.result()  # re-raises the final upload error, leaving no manifest
+        objects[name] = {'generation': getattr(blob, 'generation', None)}
+
+    # the manifest goes last: readers only treat the episode as cached once it exists
+    manifest = {
+        'created_at': time.time(),
+        'podcast': paths.podcast,
+        'review': paths.review,
+        'transcripts': paths.transcripts,
+        'chapters': paths.chapters if chapters is not None else None,
+        'podcast_size': len(podcast_bytes),
+        'duration_s': chapters['duration_s'] if chapters is not None else None,
+        # set when admission control cut the source count; such an episode is
+        # rebuilt in full once the budget allows
+        'sources_limit': sources_limit,
+        'objects': objects,
+    }
+    _with_retry(lambda: _upload(bucket.blob(paths.manifest), json.dumps(manifest).encode('utf-8'),
+                                'application/json'), paths.manifest)
+    logger.info(f"Published '{paths.manifest}' in {time.time() - start:.2f}s")
+    if on_committed is not None:
+        on_committed(manifest)
+    return manifest
+
+
+def publish_episode(bucket, paths, podcast_bytes: bytes, review, video_transcripts, chapters=None,
+                    on_committed=None, sources_limit=None, on_failed=None):
+    """
+    Upload a finished episode in the background: MP3, script, transcripts and
+    chapter index in parallel (with retries), then the manifest that commits them.
+    Returns a Future; the caller does not need to wait on it. on_failed(error)
+    runs if the episode could not be committed.
+    """
+    future = _publish_pool.submit(_publish, bucket, paths, podcast_bytes, review, video_transcripts,
+                                  chapters, on_committed, sources_limit)
+    with _in_flight_lock:
+        _in_flight.add(future)
+
+    def _done(f):
+        with _in_flight_lock:
+            _in_flight.discard(f)
+        if f.exception() is not None:
+            logger.error(f"Publishing '{paths.manifest}' failed: {f.exception()}")
+            if on_failed is not None:
+                on_failed(f.exception())
+
+    future.add_done_callback(_done)
+    return future
+
+
+def wait_for_uploads(timeout: float | None = None):
+    """
+    Block until in-flight publish jobs finish (e.g. before process exit or in tools).
+    """
+    with _in_flight_lock:
+        pending = list(_in_flight)
+    wait(pending, timeout=timeout)
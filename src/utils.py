@@ -1,11 +1,110 @@
-from src.config import llm
 import asyncio
-from imdb import IMDb
+import logging
+import time
 
+from src.clients import get_async_llm
+from src.config import LLM_ROUTES
+from src.hedging import hedged
+from src.llm_cache import llm_cache
+from src import metrics
 
-async def get_gemini_response(prompt):
-    response = await asyncio.to_thread(llm.generate_content, prompt)
-    return response.text.strip()
+logger = logging.getLogger(__name__)
+
+
+def _route(route):
+    config = LLM_ROUTES.get(route, LLM_ROUTES["default"])
+    return config["model"], config["generation_config"]
+
+
+def _deadline(route):
+    return LLM_ROUTES.get(route, LLM_ROUTES["default"]).get("deadline_s")
+
+
+def _token_counts(response) -> tuple[int, int]:
+    usage = getattr(response, 'usage_metadata', None)
+    if usage is None:
+        return 0, 0
+    return usage.prompt_token_count or 0, usage.candidates_token_count or 0
+
+
+async def get_gemini_response(prompt, route="default", parse=None):
+    """
+    Single entry point for Gemini calls. `route` names the pipeline stage
+    and selects the model and generation config from LLM_ROUTES.
+
+    With `parse`, returns parse(text) instead of the text, and a response
+    that parse rejects (by raising) is never cached, so a retry makes a
+    fresh call rather than replaying the malformed reply.
+    """
+    parse = parse or (lambda text: text)
+    model_name, generation_config = _route(route)
+    key = llm_cache.key(model_name, prompt, generation_config)
+    cached = llm_cache.get(key)
+    if cached is not None:
+        try:
+            result = parse(cached)
+        except ValueError:
+            logger.warning(f"Ignoring cached {route} response that no longer parses")
+        else:
+            metrics.record_cache_hit(route)
+            return result
+
+    async def _call():
+        return await get_async_llm(model_name).generate_content_async(
+            prompt, generation_config=generation_config or None)
+
+    try:
+        response, latency = await hedged(route, _call, deadline=_deadline(route))
+        text = response.text.strip()
+    except Exception:
+        metrics.record_error(route)
+        raise
+    metrics.record_call(route, latency, *_token_counts(response))
+    result = parse(text)
+    llm_cache.put(key, model_name, generation_config, text)
+    return result
+
+
+async def get_gemini_response_stream(prompt, route="default"):
+    """
+    Stream the response text chunk by chunk as Gemini produces it.
+    A cached response is replayed as a single chunk. The route's deadline
+    bounds the wait for each chunk rather than the whole stream, and
+    streams are not hedged since chunks may already have been consumed.
+    """
+    model_name, generation_config = _route(route)
+    key = llm_cache.key(model_name, prompt, generation_config)
+    cached = llm_cache.get(key)
+    if cached is not None:
+        metrics.record_cache_hit(route)
+        yield cached
+        return
+
+    parts = []
+    chunk = None
+    idle_timeout = _deadline(route)
+    start = time.perf_counter()
+    try:
+        response = await asyncio.wait_for(get_async_llm(model_name).generate_content_async(
+            prompt, generation_config=generation_config or None, stream=True), idle_timeout)
+        chunks = aiter(response)
+        while True:
+            try:
+                chunk = await asyncio.wait_for(anext(chunks), idle_timeout)
+            except StopAsyncIteration:
+                break
+            parts.append(chunk.text)
+            yield chunk.text
+    except TimeoutError:
+        metrics.record_timeout(route)
+        metrics.record_error(route)
+        raise
+    except Exception:
+        metrics.record_error(route)
+        raise
+    # usage on the last streamed chunk covers the whole response
+    metrics.record_call(route, time.perf_counter() - start, *_token_counts(chunk))
+    llm_cache.put(key, model_name, generation_config, ''.join(parts))
 
 
 def is_spoiler_review(title):
@@ -43,6 +142,7 @@ def is_spoiler_review(title):
 
 
 def find_similar_movie_imdb(query):
+    from imdb import IMDb
     ia = IMDb()
     try:
         movies = ia.search_movie(query)
@@ -64,6 +164,7 @@ def find_similar_movie_imdb(query):
         if description and isinstance(description, str) and '::' in description:
             description = description.split('::')[0]  # Remove author credit
         return True, {
+            'imdb_id': f"tt{best_match.movieID}",
             'title': title,
             'poster': poster,
             'release_date': release_date,